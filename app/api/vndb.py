@@ -1,20 +1,53 @@
 import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, Timeout
 
 _RETRY_ATTEMPTS = 3
 _RETRY_DELAY = 1.5
 
+# Number of API calls that can run at once. The search window sizes its
+# executor from this so every worker gets its own pooled keep-alive connection.
+API_POOL_SIZE = 2
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """
+    Returns the shared keep-alive session for the VNDB API, creating it on first use.
+    Reusing it skips the TCP + TLS handshake on every search, tag lookup and page load.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update({"User-Agent": "VnManager/1.0"})
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=API_POOL_SIZE,
+                    pool_block=True,
+                    max_retries=0,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
 
 def _post_with_retry(url: str, payload: dict) -> dict:
     """
-    Wraps requests.post with retry logic for connection errors.
+    Posts through the shared session with retry logic for connection errors.
     Retries up to _RETRY_ATTEMPTS times with a short delay between each.
+    A keep-alive connection dropped by the server also lands here and is retried.
     """
     last_exc = None
     for attempt in range(_RETRY_ATTEMPTS):
         try:
-            response = requests.post(url=url, json=payload, timeout=10)
+            response = _get_session().post(url=url, json=payload, timeout=10)
             response.raise_for_status()
             return response.json()
         except (ConnectionError, Timeout) as e:
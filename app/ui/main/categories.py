@@ -1,6 +1,7 @@
 import customtkinter
 from app.ui.shared.theme import *
 from app.utils.save import save_data
+from app.utils import library_data
 
 
 def build_categories(categories_scroll, category_entry, app_state, app):
@@ -15,13 +16,14 @@ def build_categories(categories_scroll, category_entry, app_state, app):
     """
     data = app_state.data
     selected_category = app_state.selected_category
+    # Count label of each category row, for updating counts without a re-render
+    _badges: dict = {}
 
     def add_category() -> None:
         name = category_entry.get().strip()
-        if not name or name in data["categories"]:
+        if not name or not library_data.add_category(data, name):
             return
-        data["categories"].append(name)
-        save_data(data)
+        save_data(data, ("add_category", name))
         category_entry.delete(0, "end")
         refresh_categories()
 
@@ -40,18 +42,14 @@ def build_categories(categories_scroll, category_entry, app_state, app):
             refresh_categories()
             return
 
-        index = data["categories"].index(oldname)
-        data["categories"][index] = newname
-
-        if oldname in data["vns"]:
-            data["vns"][newname] = data["vns"].pop(oldname)
+        library_data.rename_category(data, oldname, newname)
 
         if selected_category[0] == oldname:
             selected_category[0] = newname
             if app_state.right_title:
                 app_state.right_title.configure(text=newname)
 
-        save_data(data)
+        save_data(data, ("rename_category", oldname, newname))
         refresh_categories()
 
     def start_rename(category: str, row_frame) -> None:
@@ -144,10 +142,8 @@ def build_categories(categories_scroll, category_entry, app_state, app):
 
         def confirm():
             popup.destroy()
-            if name in data["categories"]:
-                data["categories"].remove(name)
-                data["vns"].pop(name, None)
-                save_data(data)
+            if library_data.delete_category(data, name):
+                save_data(data, ("delete_category", name))
                 if selected_category[0] == name:
                     selected_category[0] = None
                     if app_state.right_title:
@@ -166,10 +162,11 @@ def build_categories(categories_scroll, category_entry, app_state, app):
         """
         for widget in categories_scroll.winfo_children():
             widget.destroy()
+        _badges.clear()
 
         for category in data["categories"]:
             is_active = (category == selected_category[0])
-            count = len(data["vns"].get(category, []))
+            count = library_data.category_size(data, category)
 
             row_frame = customtkinter.CTkFrame(categories_scroll, fg_color=PINK_LIGHT if is_active else "transparent", corner_radius=10)
             row_frame.pack(fill="x", pady=2)
@@ -203,11 +200,13 @@ def build_categories(categories_scroll, category_entry, app_state, app):
             )
             badge.pack(side="right", padx=(0, 2))
             badge.pack_propagate(False)
-            customtkinter.CTkLabel(
+            badge_label = customtkinter.CTkLabel(
                 badge, text=str(count),
                 font=("Nunito", 10, "bold"),
                 text_color=WHITE if is_active else PINK_DARK,
-            ).place(relx=0.5, rely=0.5, anchor="center")
+            )
+            badge_label.place(relx=0.5, rely=0.5, anchor="center")
+            _badges[category] = badge_label
 
             if is_active:
                 customtkinter.CTkFrame(
@@ -224,5 +223,18 @@ def build_categories(categories_scroll, category_entry, app_state, app):
             button_rename.pack(side="left", fill="x", expand=True)
             button_rename.bind("<Double-Button-1>", lambda e, c=category, f=row_frame: start_rename(c, f))
 
+    def update_category_counts(*categories: str) -> None:
+        """
+        Updates the VN count badges of the given categories in place.
+        Falls back to a full re-render if one of them has no row yet.
+        """
+        for category in categories:
+            label = _badges.get(category)
+            if label is None or not label.winfo_exists():
+                refresh_categories()
+                return
+            label.configure(text=str(library_data.category_size(data, category)))
+
     app_state.refresh_categories = refresh_categories
+    app_state.update_category_counts = update_category_counts
     return refresh_categories, add_category
@@ -1,11 +1,17 @@
 import tkinter
 import customtkinter
 from app.ui.shared.theme import *
-from app.ui.shared.components import render_tags, logical_width
+from app.ui.shared.components import is_low_perf_mode, logical_width
 from app.ui.search.vn_detail import open_vn_detail
-from app.utils.image import submit_image_task, async_load_with_hover, cover_size_for_width
-from app.utils.text import clean_description
+from app.utils.image import submit_image_task, async_load_with_hover, get_hover_image, cover_size_for_width, prefetch_covers
+from app.utils.text import clean_description, get_clean_tags
 from app.utils.save import save_data
+from app.utils import library_data, search_index
+
+# Library cards have a fixed height (the cover height plus this) so the grid can
+# be virtualized; descriptions are shortened to fit a few lines.
+CARD_EXTRA_HEIGHT = 150
+CARD_DESCRIPTION_LENGTH = 260
 
 
 def build_library(vns_scroll, right_panel, app_state, app):
@@ -24,17 +30,55 @@ def build_library(vns_scroll, right_panel, app_state, app):
     sort_var = app_state.sort_var
     _render_gen = [0]
     _search_job = [None]
-    image_futures: list = []
 
-    def _cancel_image_tasks() -> None:
-        futures = list(image_futures)
-        image_futures.clear()
-        for future in futures:
-            future.cancel()
+    # The grid is virtualized: only rows of cards in or near the visible part of
+    # the list exist as widgets. They are window items on vns_scroll's canvas at
+    # row * row height (cards have a fixed height), and an invisible item at the
+    # bottom of the last row makes the scroll region span the whole category.
+    # That keeps every real window small; one frame holding all rows would pass
+    # the 32k pixel window size limit of X11 on large categories.
+    OVERSCAN_ROWS = 2
+    BATCH = 6
+    canvas = vns_scroll._parent_canvas
+    _view = {"vns": [], "cat": None, "cover_size": (150, 200), "row_px": 1, "end_marker": None, "shown": None}
+    # Cards on the canvas by their index in _view["vns"]
+    _built_cards: dict[int, dict] = {}
+    # Cards that left the view, hidden and kept for rebinding instead of being destroyed
+    _card_pool: list = []
+    _row_prefetches: dict[int, list] = {}
+    _pending: list = []
+    _build_job = [None]
+    _viewport_job = [None]
 
     def _card_wraplength() -> int:
         return max(120, (logical_width(right_panel) // 2) - 160)
 
+    def _card_height(cover_size: tuple) -> int:
+        # Cover, description clipped to a few lines, notes bar and paddings
+        return cover_size[1] + CARD_EXTRA_HEIGHT
+
+    def _scaling() -> float:
+        try:
+            return customtkinter.ScalingTracker.get_widget_scaling(vns_scroll)
+        except Exception:
+            return 1.0
+
+    def _row_height_px(cover_size: tuple) -> int:
+        # Card plus its padding above and below
+        return max(1, round((_card_height(cover_size) + 12) * _scaling()))
+
+    def _card_geometry(idx: int) -> tuple:
+        # (x, y, width, height) of a card's canvas item, in canvas pixels
+        pad = 6 * _scaling()
+        column_width = max(1, canvas.winfo_width()) / 2
+        row, col = divmod(idx, 2)
+        return (
+            col * column_width + pad,
+            row * _view["row_px"] + pad,
+            max(1, column_width - 2 * pad),
+            max(1, _view["row_px"] - 2 * pad),
+        )
+
     def _sort_vns(vns: list) -> list:
         sort = sort_var.get()
         if sort == "Title (A-Z)":
@@ -47,31 +91,155 @@ def build_library(vns_scroll, right_panel, app_state, app):
             return sorted(vns, key=lambda v: v.get("length") or 0, reverse=True)
         return sorted(vns, key=lambda v: v.get("added_at") or 0, reverse=True)
 
+    def _row_count() -> int:
+        return (len(_view["vns"]) + 1) // 2
+
+    def _update_scroll_region() -> None:
+        bottom = _row_count() * _view["row_px"]
+        if _view["end_marker"] is None:
+            _view["end_marker"] = canvas.create_rectangle(0, 0, 1, 1, outline="", fill="")
+        canvas.coords(_view["end_marker"], 0, max(0, bottom - 1), 1, bottom)
+        canvas.configure(scrollregion=canvas.bbox("all"))
+
+    def _place_card(card: dict, idx: int) -> None:
+        x, y, width, height = _card_geometry(idx)
+        canvas.coords(card["item"], x, y)
+        canvas.itemconfigure(card["item"], width=width, height=height, state="normal")
+
+    def _clear_cards() -> None:
+        _pending.clear()
+        for card in _built_cards.values():
+            _release_card(card)
+        _built_cards.clear()
+        for futures in _row_prefetches.values():
+            for future in futures:
+                future.cancel()
+        _row_prefetches.clear()
+
+    def _visible_rows() -> tuple[int, int]:
+        top = canvas.canvasy(0)
+        row_px = _view["row_px"]
+        return int(top // row_px), int((top + max(1, canvas.winfo_height())) // row_px)
+
+    def _update_viewport() -> None:
+        """
+        Builds the card rows that scrolled into view (plus OVERSCAN_ROWS on each
+        side) and releases the cards that scrolled well out of it.
+        """
+        _viewport_job[0] = None
+        n_rows = _row_count()
+        if not n_rows:
+            return
+        first_visible, last_visible = _visible_rows()
+        first_visible = min(first_visible, n_rows - 1)
+        last_visible = min(max(last_visible, first_visible), n_rows - 1)
+        first = max(0, first_visible - OVERSCAN_ROWS)
+        last = min(n_rows - 1, last_visible + OVERSCAN_ROWS)
+        # Rows just past the window are kept so scrolling back and forth doesn't rebuild them
+        for idx in [i for i in _built_cards if not first - OVERSCAN_ROWS <= i // 2 <= last + OVERSCAN_ROWS]:
+            _release_card(_built_cards.pop(idx))
+
+        vns = _view["vns"]
+        wanted = [idx for idx in range(first * 2, min(len(vns), last * 2 + 2)) if idx not in _built_cards]
+        # Visible rows first, then the overscan below and above them
+        wanted.sort(key=lambda idx: 0 if first_visible <= idx // 2 <= last_visible else 1 + abs(idx // 2 - first_visible))
+        for row in dict.fromkeys(idx // 2 for idx in wanted):
+            if row not in _row_prefetches:
+                urls = ((vn.get("image") or {}).get("url", "") for vn in vns[row * 2:row * 2 + 2])
+                _row_prefetches[row] = prefetch_covers(urls, size=_view["cover_size"])
+        # Queued cover downloads for rows that left the window are not needed any more
+        for row in [r for r in _row_prefetches if not first <= r <= last]:
+            for future in _row_prefetches.pop(row):
+                future.cancel()
+        _pending[:] = wanted
+        if wanted and _build_job[0] is None:
+            _build_pending(_render_gen[0])
+
+    def _schedule_viewport_update() -> None:
+        if _viewport_job[0] is None:
+            _viewport_job[0] = app.after_idle(_update_viewport)
+
+    def _build_pending(gen: int) -> None:
+        _build_job[0] = None
+        if gen != _render_gen[0]:
+            return
+        built = 0
+        while _pending and built < BATCH:
+            idx = _pending.pop(0)
+            if idx in _built_cards or idx >= len(_view["vns"]):
+                continue
+            card = _acquire_card()
+            _bind_card(card, idx)
+            _place_card(card, idx)
+            _built_cards[idx] = card
+            built += 1
+        if _pending:
+            _build_job[0] = app.after(16, lambda: _build_pending(gen))
+
+    def _relayout(vns: list) -> None:
+        """
+        Shows a new version of the current list (an item added, removed or
+        reordered) without a full refresh: cards are matched to their VN by id
+        and only moved; just the cards for VNs that newly came into the window
+        are bound, and the ones that left it are released.
+        """
+        if not vns:
+            refresh_right_panel()
+            return
+        position = {vn["id"]: idx for idx, vn in enumerate(vns)}
+        cards = list(_built_cards.values())
+        _built_cards.clear()
+        _view["vns"] = vns
+        for card in cards:
+            idx = position.get(card["vn"]["id"])
+            if idx is None:
+                _release_card(card)
+                continue
+            _built_cards[idx] = card
+            _place_card(card, idx)
+        # Row prefetches are keyed by position, which just changed
+        for futures in _row_prefetches.values():
+            for future in futures:
+                future.cancel()
+        _row_prefetches.clear()
+        _update_scroll_region()
+        _update_viewport()
+
     def refresh_right_panel() -> None:
         """
         Re-renders the VN list for the currently selected category.
-        Filters results by the current search bar query if one is set.
+        Filters results by the current search bar query (titles, tags and notes,
+        see search_index.py) if one is set.
         Does nothing if no category is selected.
         """
         _render_gen[0] += 1
-        gen = _render_gen[0]
-        _cancel_image_tasks()
+        if _build_job[0] is not None:
+            app.after_cancel(_build_job[0])
+            _build_job[0] = None
+        _clear_cards()
+        _view["vns"] = []
+        _update_scroll_region()
         for widget in vns_scroll.winfo_children():
             widget.destroy()
+        canvas.itemconfigure(vns_scroll._create_window_id, state="normal")
 
         cat = selected_category[0]
+        # Set before any early return: on_vn_added compares against it to replace
+        # the empty message
+        _view["cat"] = cat
         if cat is None:
             return
 
         if app_state.right_title:
             app_state.right_title.configure(text=cat)
 
-        query = search_var.get().strip().lower()
-        vns = [
-            v for v in data["vns"].get(cat, [])
-            if query in v["title"].lower() or query in (v.get("alttitle") or "").lower()
-        ]
-        vns = _sort_vns(vns)
+        query = search_var.get().strip()
+        if query:
+            matched = search_index.search(data, query, cat)
+            vns = [library_data.category_vn(data, cat, vn_id) for vn_id in matched]
+            vns = _sort_vns([v for v in vns if v is not None])
+        else:
+            vns = _sort_vns(library_data.category_vns(data, cat))
 
         if not vns:
             customtkinter.CTkLabel(
@@ -80,146 +248,285 @@ def build_library(vns_scroll, right_panel, app_state, app):
                 font=("Arial", 13),
                 text_color="gray",
             ).pack(pady=40)
+            _view["shown"] = (cat, query)
             return
 
-        vns_scroll.columnconfigure(0, weight=1, uniform="col")
-        vns_scroll.columnconfigure(1, weight=1, uniform="col")
-
+        # The cards live on the canvas itself; the scrollable frame only holds the empty message
+        canvas.itemconfigure(vns_scroll._create_window_id, state="hidden")
+        if (cat, query) != _view["shown"]:
+            canvas.yview_moveto(0)
         cover_size = cover_size_for_width(right_panel.winfo_width(), "card")
+        _view.update(vns=vns, cat=cat, cover_size=cover_size, row_px=_row_height_px(cover_size), shown=(cat, query))
+        _update_scroll_region()
+        _update_viewport()
 
-        BATCH = 6
-
-        def _render_batch(start_index: int) -> None:
-            if gen != _render_gen[0]:
-                return
-            for idx in range(start_index, min(start_index + BATCH, len(vns))):
-                vn = vns[idx]
-                row, col = divmod(idx, 2)
-                year = (vn.get("released") or "?")[:4]
-                img_url = (vn.get("image") or {}).get("url", "")
-                rating = vn.get("rating")
-
-                card = customtkinter.CTkFrame(vns_scroll, fg_color=CARD_BG, border_width=1, border_color=BORDER, corner_radius=16)
-                card.grid(row=row, column=col, padx=6, pady=6, sticky="nsew")
-
-                top_row = customtkinter.CTkFrame(card, fg_color="transparent")
-                top_row.pack(fill="x", padx=12, pady=(12, 0))
-
-                cover_frame = customtkinter.CTkFrame(top_row, width=cover_size[0], height=cover_size[1], fg_color=PINK_LIGHT, corner_radius=10, cursor="hand2")
-                cover_frame.pack(side="left", padx=(0, 10))
-                cover_frame.pack_propagate(False)
-
-                img_label = customtkinter.CTkLabel(cover_frame, text="Loading...", font=("Nunito", 24), cursor="hand2", fg_color="transparent")
-                img_label.place(relx=0.5, rely=0.5, anchor="center")
-
-                _images = {"normal": None, "dimmed": None}
-
-                if img_url:
-                    future = submit_image_task(async_load_with_hover, img_label, img_url, cover_size, _images)
-                    image_futures.append(future)
-
-                def on_enter(_e, lbl=img_label, imgs=_images, cf=cover_frame):
-                    cf.configure(fg_color=COVER_HOVER_BG)
-                    if imgs["dimmed"]:
-                        lbl.configure(image=imgs["dimmed"])
-                def on_leave(_e, lbl=img_label, imgs=_images, cf=cover_frame):
-                    cf.configure(fg_color=PINK_LIGHT)
-                    if imgs["normal"]:
-                        lbl.configure(image=imgs["normal"])
-
-                for widget in (cover_frame, img_label):
-                    widget.bind("<Enter>", on_enter)
-                    widget.bind("<Leave>", on_leave)
-                    widget.bind("<Button-1>", lambda _e, v=vn: open_vn_detail(app, v))
-
-                btn_col = customtkinter.CTkFrame(top_row, fg_color="transparent")
-                btn_col.pack(side="right", anchor="n", padx=(4, 0))
-
-                customtkinter.CTkButton(
-                    btn_col, text="X", width=26, height=26,
-                    fg_color=PINK_LIGHT, hover_color=PINK,
-                    text_color=PINK_DARK, font=("Nunito", 12, "bold"),
-                    corner_radius=13,
-                    command=lambda v=vn, c=cat: remove_vn(c, v),
-                ).pack(pady=(0, 4))
-
-                customtkinter.CTkButton(
-                    btn_col, text="Move", width=26, height=26,
-                    fg_color=PINK_LIGHT, hover_color=PINK,
-                    text_color=PINK_DARK, font=("Nunito", 12, "bold"),
-                    corner_radius=13,
-                    command=lambda v=vn, c=cat: move_vn(c, v),
-                ).pack()
-
-                text_frame = customtkinter.CTkFrame(top_row, fg_color="transparent")
-                text_frame.pack(side="left", fill="y", expand=False)
-
-                title_lbl = customtkinter.CTkLabel(
-                    text_frame,
-                    text=f"{vn['title']}",
-                    font=FONT_H2,
-                    text_color=TEXT,
-                    anchor="w",
-                    wraplength=_card_wraplength(),
-                    cursor="hand2",
-                )
-                title_lbl.pack(fill="x")
-                title_lbl.bind("<Button-1>", lambda _e, v=vn: open_vn_detail(app, v))
-
-                def _update_wraplength(lbl=title_lbl):
-                    w = logical_width(text_frame)
-                    if w > 10:
-                        lbl.configure(wraplength=w - 8)
-                    else:
-                        lbl.configure(wraplength=_card_wraplength())
-
-                title_lbl.bind("<Configure>", lambda e, lbl=title_lbl: _update_wraplength(lbl))
-
-                customtkinter.CTkLabel(text_frame, text=year, text_color=TEXT_MUTED, font=FONT_SMALL, anchor='w').pack(fill="x")
-
-                if rating:
-                    rating_frame = customtkinter.CTkFrame(text_frame, fg_color=PINK_LIGHT, corner_radius=20)
-                    rating_frame.pack(anchor='w', pady=(4, 0))
-                    customtkinter.CTkLabel(rating_frame, text=f"★ {rating/10:.2f}", font=('Nunito', 11, "bold"), text_color=PINK_DARK).pack(padx=8, pady=2)
-
-                render_tags(text_frame, vn, max_tags=5)
-
-                desc_lbl = customtkinter.CTkLabel(
-                    card,
-                    text=clean_description(vn.get("description"), 500),
-                    font=FONT_SMALL,
-                    text_color=TEXT_MUTED,
-                    anchor="w",
-                    wraplength=_card_wraplength(),
-                    justify="left",
-                )
-                desc_lbl.pack(fill="x", padx=12, pady=(8, 4))
-                desc_lbl.bind("<Configure>", lambda e, lbl=desc_lbl, c=card: lbl.configure(wraplength=max(100, logical_width(c) - 32)))
-
-                # Notes section
-                notes_bar = customtkinter.CTkFrame(card, fg_color=PINK_SOFT, corner_radius=8, height=32)
-                notes_bar.pack(side="bottom", fill="x", padx=12, pady=(0, 10))
-                notes_bar.pack_propagate(False)
-
-                note_text = vn.get("notes", "").strip()
-                note_preview = (note_text[:60] + "…") if len(note_text) > 60 else note_text
-                notes_label = customtkinter.CTkLabel(
-                    notes_bar,
-                    text=f"{note_preview}" if note_text else "Add a note...",
-                    font=FONT_SMALL,
-                    text_color=TEXT if note_text else TEXT_MUTED,
-                    anchor="w",
-                    wraplength=0,
-                    justify="left",
-                    cursor="hand2",
-                )
-                notes_label.pack(side="left", fill="x", expand=True, padx=(8, 4), pady=6)
-                notes_label.bind("<Button-1>", lambda _e, v=vn, lbl=notes_label, c=cat: open_notes_popup(c, v, lbl))
-
-            if start_index + BATCH < len(vns):
-                app.after(16, lambda: _render_batch(start_index + BATCH))
+    def _new_card() -> dict:
+        """
+        Creates the widgets of one library card, hidden on the canvas and not yet
+        bound to a VN (see _bind_card). The handlers read the card's current
+        binding, so a card can be rebound without touching them.
+        """
+        card = {"vn": None, "cat": None, "url": "", "cover_size": None, "images": {}, "future": None, "chips": [], "tags_mode": None}
+        frame = customtkinter.CTkFrame(canvas, fg_color=CARD_BG, border_width=1, border_color=BORDER, corner_radius=16)
+        card["frame"] = frame
+        card["item"] = canvas.create_window(0, 0, window=frame, anchor="nw", state="hidden")
+
+        top_row = customtkinter.CTkFrame(frame, fg_color="transparent")
+        top_row.pack(fill="x", padx=12, pady=(12, 0))
+
+        cover_frame = customtkinter.CTkFrame(top_row, fg_color=PINK_LIGHT, corner_radius=10, cursor="hand2")
+        cover_frame.pack(side="left", padx=(0, 10))
+        cover_frame.pack_propagate(False)
+        card["cover_frame"] = cover_frame
+
+        img_label = customtkinter.CTkLabel(cover_frame, text="Loading...", font=("Nunito", 24), cursor="hand2", fg_color="transparent")
+        img_label.place(relx=0.5, rely=0.5, anchor="center")
+        card["img_label"] = img_label
+
+        def on_enter(_e):
+            cover_frame.configure(fg_color=COVER_HOVER_BG)
+            dimmed = get_hover_image(card["images"], card["url"], card["cover_size"])
+            if dimmed:
+                img_label.configure(image=dimmed)
+        def on_leave(_e):
+            cover_frame.configure(fg_color=PINK_LIGHT)
+            if card["images"].get("normal"):
+                img_label.configure(image=card["images"]["normal"])
+
+        for widget in (cover_frame, img_label):
+            widget.bind("<Enter>", on_enter)
+            widget.bind("<Leave>", on_leave)
+            widget.bind("<Button-1>", lambda _e: open_vn_detail(app, card["vn"]))
+
+        btn_col = customtkinter.CTkFrame(top_row, fg_color="transparent")
+        btn_col.pack(side="right", anchor="n", padx=(4, 0))
+
+        customtkinter.CTkButton(
+            btn_col, text="X", width=26, height=26,
+            fg_color=PINK_LIGHT, hover_color=PINK,
+            text_color=PINK_DARK, font=("Nunito", 12, "bold"),
+            corner_radius=13,
+            command=lambda: remove_vn(card["cat"], card["vn"]),
+        ).pack(pady=(0, 4))
+
+        customtkinter.CTkButton(
+            btn_col, text="Move", width=26, height=26,
+            fg_color=PINK_LIGHT, hover_color=PINK,
+            text_color=PINK_DARK, font=("Nunito", 12, "bold"),
+            corner_radius=13,
+            command=lambda: move_vn(card["cat"], card["vn"]),
+        ).pack()
+
+        text_frame = customtkinter.CTkFrame(top_row, fg_color="transparent")
+        text_frame.pack(side="left", fill="y", expand=False)
+        card["text_frame"] = text_frame
+
+        title_lbl = customtkinter.CTkLabel(
+            text_frame,
+            text="",
+            font=FONT_H2,
+            text_color=TEXT,
+            anchor="w",
+            wraplength=_card_wraplength(),
+            cursor="hand2",
+        )
+        title_lbl.pack(fill="x")
+        title_lbl.bind("<Button-1>", lambda _e: open_vn_detail(app, card["vn"]))
+        card["title"] = title_lbl
+
+        def _update_wraplength():
+            w = logical_width(text_frame)
+            if w > 10:
+                title_lbl.configure(wraplength=w - 8)
+            else:
+                title_lbl.configure(wraplength=_card_wraplength())
+
+        title_lbl.bind("<Configure>", lambda e: _update_wraplength())
+
+        card["year"] = customtkinter.CTkLabel(text_frame, text="", text_color=TEXT_MUTED, font=FONT_SMALL, anchor='w')
+        card["year"].pack(fill="x")
+
+        # Packed only for VNs with a rating
+        card["rating_frame"] = customtkinter.CTkFrame(text_frame, fg_color=PINK_LIGHT, corner_radius=20)
+        card["rating"] = customtkinter.CTkLabel(card["rating_frame"], text="", font=('Nunito', 11, "bold"), text_color=PINK_DARK)
+        card["rating"].pack(padx=8, pady=2)
+
+        # Notes section; packed before the description so that a long description
+        # is what gets clipped by the fixed card height
+        notes_bar = customtkinter.CTkFrame(frame, fg_color=PINK_SOFT, corner_radius=8, height=32)
+        notes_bar.pack(side="bottom", fill="x", padx=12, pady=(0, 10))
+        notes_bar.pack_propagate(False)
+
+        notes_label = customtkinter.CTkLabel(
+            notes_bar,
+            text="",
+            font=FONT_SMALL,
+            anchor="w",
+            wraplength=0,
+            justify="left",
+            cursor="hand2",
+        )
+        notes_label.pack(side="left", fill="x", expand=True, padx=(8, 4), pady=6)
+        notes_label.bind("<Button-1>", lambda _e: open_notes_popup(card["cat"], card["vn"], card))
+        card["notes"] = notes_label
+
+        desc_lbl = customtkinter.CTkLabel(
+            frame,
+            text="",
+            font=FONT_SMALL,
+            text_color=TEXT_MUTED,
+            anchor="nw",
+            wraplength=_card_wraplength(),
+            justify="left",
+        )
+        desc_lbl.pack(fill="x", padx=12, pady=(8, 4))
+        desc_lbl.bind("<Configure>", lambda e: desc_lbl.configure(wraplength=max(100, logical_width(frame) - 32)))
+        card["desc"] = desc_lbl
+        return card
+
+    def _bind_tags(card: dict, vn: dict) -> None:
+        # Same look as render_tags(), but reusing the card's chips
+        tags = get_clean_tags(vn, max_tags=5)
+        mode = "text" if is_low_perf_mode() else "chips"
+        if card["tags_mode"] != mode:
+            if card["tags_mode"] is not None:
+                card["tags"].destroy()
+                card["chips"] = []
+            if mode == "text":
+                card["tags"] = customtkinter.CTkLabel(card["text_frame"], text="", font=("Quicksand", 10), text_color=TEXT_MUTED, anchor="w")
+            else:
+                card["tags"] = customtkinter.CTkFrame(card["text_frame"], fg_color="transparent")
+            card["tags_mode"] = mode
+        holder = card["tags"]
+        if not tags:
+            holder.pack_forget()
+            return
+        if mode == "text":
+            holder.configure(text=" · ".join(tags))
+        else:
+            chips = card["chips"]
+            while len(chips) < len(tags):
+                chip = customtkinter.CTkFrame(holder, fg_color=PINK_SOFT, corner_radius=20, border_width=1, border_color=BORDER)
+                label = customtkinter.CTkLabel(chip, text="", font=("Quicksand", 10), text_color=TEXT_MUTED)
+                label.pack(padx=8, pady=2)
+                chips.append((chip, label))
+            for i, (chip, label) in enumerate(chips):
+                if i < len(tags):
+                    label.configure(text=tags[i])
+                    if not chip.winfo_manager():
+                        chip.pack(side="left", padx=(0, 4), pady=2)
+                elif chip.winfo_manager():
+                    chip.pack_forget()
+        # Tags always follow the year and rating lines
+        after = card["rating_frame"] if card["rating_frame"].winfo_manager() else card["year"]
+        if mode == "text":
+            holder.pack(anchor="w", pady=(4, 0), after=after)
+        else:
+            holder.pack(anchor="w", fill="x", pady=(4, 0), after=after)
 
-        _render_batch(0)
+    def _bind_card(card: dict, idx: int) -> None:
+        """
+        Points a card at _view["vns"][idx], updating its widgets in place, and
+        starts its cover load.
+        """
+        vn = _view["vns"][idx]
+        rating = vn.get("rating")
+        card.update(vn=vn, cat=_view["cat"], url=(vn.get("image") or {}).get("url", ""))
+        img_label = card["img_label"]
+        img_label.configure(image=None, text="Loading...")
+        # CTkLabel keeps showing the previous photo when given image=None
+        img_label._label.configure(image="")
+        _bind_cover(card)
+
+        card["title"].configure(text=f"{vn['title']}")
+        card["year"].configure(text=(vn.get("released") or "?")[:4])
+        if rating:
+            card["rating"].configure(text=f"★ {rating/10:.2f}")
+            if not card["rating_frame"].winfo_manager():
+                card["rating_frame"].pack(anchor='w', pady=(4, 0), after=card["year"])
+        elif card["rating_frame"].winfo_manager():
+            card["rating_frame"].pack_forget()
+        _bind_tags(card, vn)
+
+        note_text = vn.get("notes", "").strip()
+        note_preview = (note_text[:60] + "…") if len(note_text) > 60 else note_text
+        card["notes"].configure(
+            text=f"{note_preview}" if note_text else "Add a note...",
+            text_color=TEXT if note_text else TEXT_MUTED,
+        )
+        card["desc"].configure(text=clean_description(vn.get("description"), CARD_DESCRIPTION_LENGTH, collapse_whitespace=True))
+
+    def _bind_cover(card: dict) -> None:
+        # Loads the card's cover at the current size. Whatever the label shows
+        # stays up until the new image arrives.
+        cover_size = _view["cover_size"]
+        # A cover still loading for the previous VN or size must not land on this card
+        card["images"]["stale"] = True
+        card["images"] = {"normal": None, "dimmed": None}
+        if card["future"] is not None:
+            card["future"].cancel()
+            card["future"] = None
+        if card["cover_size"] != cover_size:
+            card["cover_frame"].configure(width=cover_size[0], height=cover_size[1])
+            card["cover_size"] = cover_size
+        if card["url"]:
+            card["future"] = submit_image_task(async_load_with_hover, card["img_label"], card["url"], cover_size, card["images"])
+
+    def _acquire_card() -> dict:
+        return _card_pool.pop() if _card_pool else _new_card()
+
+    def _release_card(card: dict) -> None:
+        if card["future"] is not None:
+            card["future"].cancel()
+            card["future"] = None
+        canvas.itemconfigure(card["item"], state="hidden")
+        # Hidden window items still count as a 1x1 box in bbox("all"); keep them
+        # from stretching the scroll region
+        canvas.coords(card["item"], 0, 0)
+        card["images"]["stale"] = True
+        card["images"] = {}
+        _card_pool.append(card)
+
+    def _layout_cards(_event=None) -> None:
+        # Canvas items don't follow the canvas width on their own
+        for idx, card in _built_cards.items():
+            _place_card(card, idx)
+        if _view["vns"]:
+            _schedule_viewport_update()
+
+    canvas.bind("<Configure>", _layout_cards, add="+")
+
+    def reflow_right_panel() -> None:
+        """
+        Adapts the shown list to a new panel size without re-rendering it.
+        Card positions and text wrapping already follow the canvas size; this
+        only acts when the cover size bucket changed, resizing the cards in
+        place and reloading just their covers (from the image caches).
+        """
+        if not _view["vns"]:
+            return
+        cover_size = cover_size_for_width(right_panel.winfo_width(), "card")
+        if cover_size == _view["cover_size"]:
+            return
+        # Keep the first visible card in view
+        first_row = _visible_rows()[0]
+        _view.update(cover_size=cover_size, row_px=_row_height_px(cover_size))
+        for idx, card in _built_cards.items():
+            _bind_cover(card)
+            _place_card(card, idx)
+        _update_scroll_region()
+        canvas.yview_moveto(first_row * _view["row_px"] / max(1, _row_count() * _view["row_px"]))
+        _update_viewport()
+
+    scrollbar_set = vns_scroll._scrollbar.set
+
+    def _on_yview(*args) -> None:
+        # The canvas reports every scroll and content/size change here
+        scrollbar_set(*args)
+        if _view["vns"]:
+            _schedule_viewport_update()
+
+    vns_scroll._parent_canvas.configure(yscrollcommand=_on_yview)
 
     def _schedule_refresh(*_args) -> None:
         if _search_job[0]:
@@ -228,18 +535,52 @@ def build_library(vns_scroll, right_panel, app_state, app):
 
     search_var.trace_add("write", _schedule_refresh)
 
+    def _drop_from_view(vn_id: str) -> None:
+        _relayout([v for v in _view["vns"] if v["id"] != vn_id])
+
+    def on_vn_added(category: str, vn_id: str) -> None:
+        """
+        Shows a VN that was just added to a category, if that category is on
+        screen and the VN matches the filter, without re-rendering the list.
+        """
+        if category != _view["cat"] or category != selected_category[0]:
+            return
+        if any(v["id"] == vn_id for v in _view["vns"]):
+            return
+        query = search_var.get().strip()
+        if query and not search_index.matches(data, vn_id, query, category):
+            return
+        vn = library_data.category_vn(data, category, vn_id)
+        if vn is None:
+            return
+        if not _view["vns"]:
+            # Replaces the empty-category message
+            refresh_right_panel()
+            return
+        _relayout(_sort_vns(_view["vns"] + [vn]))
+
+    def _update_counts(*categories: str) -> None:
+        if app_state.update_category_counts:
+            app_state.update_category_counts(*categories)
+        elif app_state.refresh_categories:
+            app_state.refresh_categories()
+
     def remove_vn(category: str, vn: dict) -> None:
         """
-        Removes a VN from a category, saves the updated data, and refreshes the panel.
+        Removes a VN from a category, saves the updated data, and drops its card.
         """
-        data["vns"][category] = [v for v in data["vns"].get(category, []) if v["id"] != vn["id"]]
-        save_data(data)
-        refresh_right_panel()
+        if library_data.remove_vn(data, category, vn["id"]) is None:
+            return
+        save_data(data, ("remove_vn", category, vn["id"]))
+        if category == _view["cat"]:
+            _drop_from_view(vn["id"])
+        _update_counts(category)
 
-    def open_notes_popup(category: str, vn: dict, notes_label) -> None:
+    def open_notes_popup(category: str, vn: dict, card: dict) -> None:
         """
         Opens a small popup to edit the personal note for a VN in a category.
-        Saves the note back into the VN dict and updates the label in-place.
+        Saves the note back into the VN dict and updates the card's label in-place
+        if the card still shows that VN.
         """
         popup = customtkinter.CTkToplevel(app)
         popup.title("Note")
@@ -274,10 +615,11 @@ def build_library(vns_scroll, right_panel, app_state, app):
         def confirm():
             note = text_box.get("0.0", "end").strip()
             vn["notes"] = note
-            save_data(data)
-            if notes_label.winfo_exists():
+            library_data.set_note(data, category, vn["id"], note)
+            save_data(data, ("note", category, vn["id"]))
+            if card["vn"] is vn and card["notes"].winfo_exists():
                 note_preview = (note[:60] + "…") if len(note) > 60 else note
-                notes_label.configure(
+                card["notes"].configure(
                     text=f"{note_preview}" if note else "Add a note...",
                     text_color=TEXT if note else TEXT_MUTED,
                 )
@@ -355,14 +697,11 @@ def build_library(vns_scroll, right_panel, app_state, app):
 
             def confirm():
                 dest = var.get()
-                data["vns"][category] = [v for v in data["vns"].get(category, []) if v["id"] != vn["id"]]
-                vns_in_dest = data["vns"].setdefault(dest, [])
-                if not any(v["id"] == vn["id"] for v in vns_in_dest):
-                    vns_in_dest.append(vn)
-                save_data(data)
-                refresh_right_panel()
-                if app_state.refresh_categories:
-                    app_state.refresh_categories()
+                if library_data.move_vn(data, category, dest, vn["id"]):
+                    save_data(data, ("move_vn", category, dest, vn["id"]))
+                    if category == _view["cat"]:
+                        _drop_from_view(vn["id"])
+                    _update_counts(category, dest)
                 popup.destroy()
 
             customtkinter.CTkButton(
@@ -411,4 +750,6 @@ def build_library(vns_scroll, right_panel, app_state, app):
     _bind_fast_results_scroll()
 
     app_state.refresh_library = refresh_right_panel
+    app_state.library_vn_added = on_vn_added
+    app_state.reflow_library = reflow_right_panel
     return refresh_right_panel
\ No newline at end of file
@@ -2,7 +2,8 @@ import os
 import tkinter
 import customtkinter
 
-from app.utils.save import load_data
+from app.utils.save import load_data, start_background_saves, flush_saves, set_save_compression
+from app.utils import library_data, startup_timing
 from app.ui.shared.theme import *
 from app.ui.shared.components import enable_touchpad_scroll, set_low_perf_mode
 from app.ui.main.menu import build_menu
@@ -10,7 +11,19 @@ from app.ui.main.categories import build_categories
 from app.ui.main.library import build_library
 from app.ui.main.settings_panel import build_settings
 from app.ui.search.search_window import open_search_window
-from app.utils.image import set_cache_main_only, set_cover_cache_max
+from app.utils.image import (
+    set_cache_main_only,
+    set_cover_cache_max,
+    set_cover_cache_max_mb,
+    set_memory_cache_budget_mb,
+    set_cover_download_limits,
+    set_image_backend,
+    shutdown_process_pool,
+    close_cover_index,
+    DEFAULT_COVER_CONNECTIONS,
+    DEFAULT_COVER_CACHE_MB,
+    DEFAULT_MEMORY_CACHE_MB,
+)
 
 
 def _apply_app_icon(app: customtkinter.CTk) -> None:
@@ -28,26 +41,38 @@ def _apply_app_icon(app: customtkinter.CTk) -> None:
 class AppState:
     def __init__(self, data, selected_category, search_var, sort_var):
         self.data = data
+        # VN id -> categories lookup, kept current by app.utils.library_data
+        self.index = library_data.attach_index(data)
         self.selected_category = selected_category
         self.search_var = search_var
         self.sort_var = sort_var
         self.right_title = None
         self.refresh_categories = None
         self.refresh_library = None
+        self.reflow_library = None
+        # Incremental updates: (category, vn_id) after an add, and (*categories) after count changes
+        self.library_vn_added = None
+        self.update_category_counts = None
 
 
-def run() -> None:
+def run(data: dict | None = None) -> None:
     """
     Builds and starts the main application window.
-    Initializes all UI panels, loads save data, and enters the Tkinter main loop.
+    Initializes all UI panels and enters the Tkinter main loop. Save data is
+    loaded here unless the caller already loaded it.
     """
     app = customtkinter.CTk()
     app.geometry("1280x720")
     app.title("VnManager")
     app.configure(fg_color=BG)
     _apply_app_icon(app)
+    startup_timing.mark("create window")
 
-    data = load_data()
+    if data is None:
+        data = load_data()
+        startup_timing.mark("load save data")
+    set_save_compression(data.get("settings", {}).get("save_compression", "auto"))
+    start_background_saves(app)
     selected_category = [None]
     search_var = tkinter.StringVar()
     sort_var = tkinter.StringVar(value="Date added")
@@ -55,7 +80,13 @@ def run() -> None:
 
     set_low_perf_mode(data.get("settings", {}).get("low_perf_mode", False))
     set_cover_cache_max(int(data.get("settings", {}).get("cover_cache_max", 500)))
+    set_cover_cache_max_mb(int(data.get("settings", {}).get("cover_cache_max_mb", DEFAULT_COVER_CACHE_MB)))
+    set_memory_cache_budget_mb(int(data.get("settings", {}).get("memory_cache_mb", DEFAULT_MEMORY_CACHE_MB)))
     set_cache_main_only(bool(data.get("settings", {}).get("cache_main_only", False)))
+    cover_connections = int(data.get("settings", {}).get("cover_download_connections", DEFAULT_COVER_CONNECTIONS))
+    set_cover_download_limits(cover_connections, cover_connections)
+    set_image_backend(data.get("settings", {}).get("image_backend", "auto"))
+    startup_timing.mark("apply settings")
 
     # ── Topbar ────────────────────────────────────────────────────────────────
     topbar = customtkinter.CTkFrame(
@@ -119,9 +150,9 @@ def run() -> None:
         width=130,
         command=lambda: open_search_window(
             app, data,
-            on_vn_added=lambda: (
-                app_state.refresh_library() if app_state.refresh_library else None,
-                app_state.refresh_categories() if app_state.refresh_categories else None,
+            on_vn_added=lambda category, vn_id: (
+                app_state.library_vn_added(category, vn_id) if app_state.library_vn_added else None,
+                app_state.update_category_counts(category) if app_state.update_category_counts else None,
             ),
         ),
     )
@@ -226,7 +257,7 @@ def run() -> None:
 
     customtkinter.CTkEntry(
         search_bar_frame,
-        placeholder_text="Filter VNs in current category...",
+        placeholder_text="Filter by title, tag or note...",
         textvariable=search_var,
         border_width=0,
         fg_color="transparent",
@@ -305,14 +336,22 @@ def run() -> None:
         _last_window_size[:] = new_size
         if _resize_job_main[0]:
             app.after_cancel(_resize_job_main[0])
+        # Cards follow the new size on their own; this only swaps covers when their size bucket changes
         _resize_job_main[0] = app.after(200, lambda: (
-            app_state.refresh_library() if (app_state.refresh_library and library_frame.winfo_ismapped()) else None
+            app_state.reflow_library() if (app_state.reflow_library and library_frame.winfo_ismapped()) else None
         ))
 
     app.bind("<Configure>", _on_main_resize)
 
     enable_touchpad_scroll(app, categories_scroll, vns_scroll, settings_scroll)
 
+    startup_timing.mark("build ui")
+
     refresh_categories()
     show_menu()
-    app.mainloop()
\ No newline at end of file
+    if startup_timing.enabled():
+        app.after_idle(lambda: (startup_timing.mark("first frame"), startup_timing.report()))
+    app.mainloop()
+    flush_saves()
+    shutdown_process_pool()
+    close_cover_index()
\ No newline at end of file
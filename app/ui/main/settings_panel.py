@@ -1,6 +1,9 @@
 import os
 import sys
+import time
 import subprocess
+import threading
+import sqlite3
 import customtkinter
 import traceback
 from app.ui.shared.theme import *
@@ -11,8 +14,41 @@ from app.ui.shared.theme import (
     MAX_FONT_SCALE,
 )
 from app.ui.shared.components import set_low_perf_mode
-from app.utils.image import set_cover_cache_max, set_cache_main_only, _COVER_CACHE_DIR
-from app.utils.save import save_data, reset_data, get_save_dir
+from app.utils.image import (
+    set_cover_cache_max,
+    set_cover_cache_max_mb,
+    set_memory_cache_budget_mb,
+    set_cache_main_only,
+    set_image_backend,
+    IMAGE_BACKENDS,
+    get_fetch_stats,
+    get_render_stats,
+    get_cover_cache_stats,
+    clear_cover_cache,
+    DEFAULT_COVER_CACHE_MB,
+    DEFAULT_MEMORY_CACHE_MB,
+    _COVER_CACHE_DIR,
+    close_cover_index,
+)
+from app.utils import library_data
+from app.utils.save import (
+    save_data,
+    reset_data,
+    get_save_dir,
+    flush_saves,
+    get_save_stats,
+    get_storage_backend,
+    set_storage_backend,
+    set_save_compression,
+    create_backup,
+    wait_for_backups,
+    get_backup_stats,
+    get_backup_dir,
+    STORAGE_BACKENDS,
+    SAVE_COMPRESSIONS,
+    BACKUP_COUNT,
+    BACKUP_INTERVAL_SECONDS,
+)
 
 
 def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
@@ -107,6 +143,9 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
         def _confirm_inner() -> None:
             on_confirm()
             popup.destroy()
+            # The restarted app reads the save file, so the new setting must be on disk first
+            flush_saves()
+            close_cover_index()
             subprocess.Popen([sys.executable, *sys.argv])
             popup.after(300, lambda: os._exit(0))
 
@@ -140,7 +179,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
 
         def _confirm() -> None:
             settings["theme_name"] = next_theme
-            save_data(data)
+            save_data(data, ("setting", "theme_name"))
 
         _open_restart_confirm_popup(
             "Confirm theme change",
@@ -190,7 +229,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
         enabled = switch_var.get() == 1
         settings["low_perf_mode"] = enabled
         set_low_perf_mode(enabled)
-        save_data(data)
+        save_data(data, ("setting", "low_perf_mode"))
 
     switch_var = customtkinter.IntVar(value=1 if settings.get("low_perf_mode", False) else 0)
     customtkinter.CTkSwitch(
@@ -204,6 +243,51 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
         command=lambda: _toggle(switch_var.get()),
     ).pack(side="right", padx=(16, 0))
 
+    backend_card = customtkinter.CTkFrame(scroll, fg_color=CARD_BG, border_width=1, border_color=BORDER, corner_radius=14)
+    backend_card.pack(fill="x", pady=(0, 8))
+
+    backend_row = customtkinter.CTkFrame(backend_card, fg_color="transparent")
+    backend_row.pack(fill="x", padx=16, pady=14)
+
+    backend_text_col = customtkinter.CTkFrame(backend_row, fg_color="transparent")
+    backend_text_col.pack(side="left", fill="x", expand=True)
+    customtkinter.CTkLabel(
+        backend_text_col, text="Cover processing",
+        font=FONT_BODY, text_color=TEXT, anchor="w",
+    ).pack(anchor="w")
+    customtkinter.CTkLabel(
+        backend_text_col,
+        text="\"process\" resizes covers in separate processes so scrolling stays smooth\nwhile a page loads. \"auto\" uses processes on 4+ core machines.",
+        font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w", justify="left",
+    ).pack(anchor="w", pady=(2, 0))
+
+    if settings.get("image_backend") not in IMAGE_BACKENDS:
+        settings["image_backend"] = "auto"
+
+    def _switch_image_backend(backend: str) -> None:
+        settings["image_backend"] = backend
+        set_image_backend(backend)
+        save_data(data, ("setting", "image_backend"))
+
+    backend_var = customtkinter.StringVar(value=settings["image_backend"])
+    customtkinter.CTkOptionMenu(
+        backend_row,
+        variable=backend_var,
+        values=list(IMAGE_BACKENDS),
+        width=140,
+        height=30,
+        fg_color=PINK_LIGHT,
+        button_color=PINK_MID,
+        button_hover_color=PINK,
+        dropdown_fg_color=CARD_BG,
+        dropdown_hover_color=PINK_LIGHT,
+        dropdown_text_color=TEXT,
+        text_color=PINK_DARK,
+        font=("Nunito", 12, "bold"),
+        corner_radius=20,
+        command=_switch_image_backend,
+    ).pack(side="right")
+
     fast_scroll_card = customtkinter.CTkFrame(scroll, fg_color=CARD_BG, border_width=1, border_color=BORDER, corner_radius=14)
     fast_scroll_card.pack(fill="x", pady=(0, 8))
 
@@ -235,7 +319,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
         units = int(val)
         fast_scroll_value_label.configure(text=str(units))
         settings["fast_results_scroll_units"] = units
-        save_data(data)
+        save_data(data, ("setting", "fast_results_scroll_units"))
 
     fast_scroll_slider = customtkinter.CTkSlider(
         fast_scroll_inner,
@@ -306,7 +390,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
 
         def _confirm() -> None:
             settings["font_scale"] = next_scale
-            save_data(data)
+            save_data(data, ("setting", "font_scale"))
 
         _open_restart_confirm_popup(
             "Confirm font scaling",
@@ -361,7 +445,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
 
         def _confirm() -> None:
             settings["high_contrast_mode"] = next_enabled
-            save_data(data)
+            save_data(data, ("setting", "high_contrast_mode"))
 
         _open_restart_confirm_popup(
             "Confirm high contrast",
@@ -459,7 +543,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
     def _toggle_cache_scope() -> None:
         settings["cache_main_only"] = not bool(settings.get("cache_main_only", False))
         _apply_cache_scope_ui()
-        save_data(data)
+        save_data(data, ("setting", "cache_main_only"))
 
     scope_button.configure(command=_toggle_cache_scope)
 
@@ -468,7 +552,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
         slider_label.configure(text=f"{limit} images")
         settings["cover_cache_max"] = limit
         set_cover_cache_max(limit)
-        save_data(data)
+        save_data(data, ("setting", "cover_cache_max"))
 
     cache_slider = customtkinter.CTkSlider(
         cache_text_col,
@@ -481,6 +565,65 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
     )
     cache_slider.pack(fill="x", pady=(0, 4))
 
+    def _add_budget_slider(title: str, description: str, from_mb: int, to_mb: int, steps: int, on_change):
+        title_row = customtkinter.CTkFrame(cache_text_col, fg_color="transparent")
+        title_row.pack(fill="x", pady=(8, 0))
+        customtkinter.CTkLabel(
+            title_row, text=title,
+            font=FONT_BODY, text_color=TEXT, anchor="w",
+        ).pack(side="left")
+        value_label = customtkinter.CTkLabel(
+            title_row,
+            text="",
+            font=("Nunito", 12, "bold"), text_color=PINK_DARK, anchor="e",
+        )
+        value_label.pack(side="right")
+        customtkinter.CTkLabel(
+            cache_text_col,
+            text=description,
+            font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w", justify="left",
+        ).pack(anchor="w", pady=(2, 8))
+
+        def _on_change(val: float) -> None:
+            limit_mb = int(val)
+            value_label.configure(text=f"{limit_mb} MB")
+            on_change(limit_mb)
+
+        slider = customtkinter.CTkSlider(
+            cache_text_col,
+            from_=from_mb, to=to_mb,
+            number_of_steps=steps,
+            command=_on_change,
+            progress_color=PINK,
+            button_color=PINK_DARK,
+            button_hover_color=PINK_DARK,
+        )
+        slider.pack(fill="x", pady=(0, 4))
+        return slider, value_label
+
+    def _on_disk_budget(limit_mb: int) -> None:
+        settings["cover_cache_max_mb"] = limit_mb
+        set_cover_cache_max_mb(limit_mb)
+        save_data(data, ("setting", "cover_cache_max_mb"))
+
+    def _on_memory_budget(limit_mb: int) -> None:
+        settings["memory_cache_mb"] = limit_mb
+        set_memory_cache_budget_mb(limit_mb)
+        save_data(data, ("setting", "memory_cache_mb"))
+
+    disk_budget_slider, disk_budget_label = _add_budget_slider(
+        "Max cache size on disk",
+        "Least recently used covers are deleted once the cache grows past this size.",
+        50, 2000, 39,
+        _on_disk_budget,
+    )
+    memory_budget_slider, memory_budget_label = _add_budget_slider(
+        "Memory for covers",
+        "Caps how much RAM downloaded and decoded covers may keep. Lower it on low-memory machines.",
+        64, 1024, 15,
+        _on_memory_budget,
+    )
+
     # Current cache size on disk
     def _format_size(num_bytes: int) -> str:
         units = ["B", "KB", "MB", "GB"]
@@ -493,22 +636,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
             size /= 1024
         return "0 B"
 
-    def _get_cache_stats() -> tuple[int, int]:
-        try:
-            count = 0
-            total_bytes = 0
-            for entry in os.scandir(_COVER_CACHE_DIR):
-                if entry.is_file(follow_symlinks=False):
-                    count += 1
-                    try:
-                        total_bytes += entry.stat().st_size
-                    except OSError:
-                        continue
-            return count, total_bytes
-        except OSError:
-            return 0, 0
-
-    count, total_size = _get_cache_stats()
+    count, total_size = get_cover_cache_stats()
     cache_info_label = customtkinter.CTkLabel(
         cache_text_col,
         text=f"Currently {count} covers cached on disk ({_format_size(total_size)}).",
@@ -516,11 +644,31 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
     )
     cache_info_label.pack(anchor="w", pady=(0, 4))
 
+    def _fetch_stats_text() -> str:
+        stats = get_fetch_stats()
+        render = get_render_stats()
+        return (
+            f"This session: {stats['downloads']} covers downloaded, "
+            f"{stats['deduplicated']} duplicate fetches avoided, "
+            f"{render['mask_hits'] + render['overlay_hits']} corner masks/overlays reused."
+        )
+
+    fetch_stats_label = customtkinter.CTkLabel(
+        cache_text_col,
+        text=_fetch_stats_text(),
+        font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w",
+    )
+    fetch_stats_label.pack(anchor="w", pady=(0, 4))
+
     def _refresh_cache_info() -> None:
-        current_count, current_total_size = _get_cache_stats()
+        current_count, current_total_size = get_cover_cache_stats()
         cache_info_label.configure(
             text=f"Currently {current_count} covers cached on disk ({_format_size(current_total_size)})."
         )
+        fetch_stats_label.configure(text=_fetch_stats_text())
+
+    # Settings is built once at startup, so refresh the numbers whenever it is shown
+    cache_info_label.bind("<Map>", lambda _e: _refresh_cache_info())
 
     def _show_cache_error_popup(title: str, message: str) -> None:
         error_popup = customtkinter.CTkToplevel(parent.winfo_toplevel())
@@ -551,10 +699,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
 
     def _clear_cache() -> None:
         try:
-            for f in os.listdir(_COVER_CACHE_DIR):
-                file_path = os.path.join(_COVER_CACHE_DIR, f)
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
+            clear_cover_cache()
         except OSError as e:
             traceback.print_exc()
             _show_cache_error_popup("Cache clear failed", f"Failed to clear cache:\n{e}")
@@ -625,8 +770,209 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
     cache_slider.set(saved_max)
     slider_label.configure(text=f"{int(cache_slider.get())} images")
     set_cover_cache_max(int(cache_slider.get()))
+    disk_budget_slider.set(settings.get("cover_cache_max_mb", DEFAULT_COVER_CACHE_MB))
+    disk_budget_label.configure(text=f"{int(disk_budget_slider.get())} MB")
+    set_cover_cache_max_mb(int(disk_budget_slider.get()))
+    memory_budget_slider.set(settings.get("memory_cache_mb", DEFAULT_MEMORY_CACHE_MB))
+    memory_budget_label.configure(text=f"{int(memory_budget_slider.get())} MB")
+    set_memory_cache_budget_mb(int(memory_budget_slider.get()))
     _apply_cache_scope_ui()
 
+    # ── Save data ─────────────────────────────────────────────────────────────────────────────
+    customtkinter.CTkLabel(
+        scroll, text="SAVE DATA",
+        font=("Nunito", 10, "bold"), text_color=TEXT_MUTED, anchor="w",
+    ).pack(anchor="w", padx=4, pady=(12, 4))
+
+    storage_card = customtkinter.CTkFrame(scroll, fg_color=CARD_BG, border_width=1, border_color=BORDER, corner_radius=14)
+    storage_card.pack(fill="x", pady=(0, 8))
+
+    storage_row = customtkinter.CTkFrame(storage_card, fg_color="transparent")
+    storage_row.pack(fill="x", padx=16, pady=14)
+
+    storage_text_col = customtkinter.CTkFrame(storage_row, fg_color="transparent")
+    storage_text_col.pack(side="left", fill="x", expand=True)
+    customtkinter.CTkLabel(
+        storage_text_col, text="Library storage",
+        font=FONT_BODY, text_color=TEXT, anchor="w",
+    ).pack(anchor="w")
+    customtkinter.CTkLabel(
+        storage_text_col,
+        text="\"json\" keeps a readable save.json plus a small change journal; \"sqlite\"\nkeeps the library in a database. Switching migrates your data.",
+        font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w", justify="left",
+    ).pack(anchor="w", pady=(2, 0))
+
+    def _save_stats_text() -> str:
+        stats = get_save_stats()
+        return (
+            f"This session: {stats['written']} of {stats['requested']} saves written, "
+            f"{stats['avoided']} merged away, ~{stats['main_thread_ms_saved']:.0f} ms kept off the UI."
+        )
+
+    save_stats_label = customtkinter.CTkLabel(
+        storage_text_col,
+        text=_save_stats_text(),
+        font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w",
+    )
+    save_stats_label.pack(anchor="w", pady=(4, 0))
+    save_stats_label.bind("<Map>", lambda _e: save_stats_label.configure(text=_save_stats_text()))
+
+    storage_var = customtkinter.StringVar(value=get_storage_backend())
+
+    def _switch_storage_backend(backend: str) -> None:
+        try:
+            set_storage_backend(data, backend)
+        except (OSError, sqlite3.Error) as e:
+            traceback.print_exc()
+            storage_var.set(get_storage_backend())
+            _show_cache_error_popup("Storage switch failed", f"Failed to migrate save data:\n{e}")
+
+    customtkinter.CTkOptionMenu(
+        storage_row,
+        variable=storage_var,
+        values=list(STORAGE_BACKENDS),
+        width=140,
+        height=30,
+        fg_color=PINK_LIGHT,
+        button_color=PINK_MID,
+        button_hover_color=PINK,
+        dropdown_fg_color=CARD_BG,
+        dropdown_hover_color=PINK_LIGHT,
+        dropdown_text_color=TEXT,
+        text_color=PINK_DARK,
+        font=("Nunito", 12, "bold"),
+        corner_radius=20,
+        command=_switch_storage_backend,
+    ).pack(side="right")
+
+    compression_card = customtkinter.CTkFrame(scroll, fg_color=CARD_BG, border_width=1, border_color=BORDER, corner_radius=14)
+    compression_card.pack(fill="x", pady=(0, 8))
+
+    compression_row = customtkinter.CTkFrame(compression_card, fg_color="transparent")
+    compression_row.pack(fill="x", padx=16, pady=14)
+
+    compression_text_col = customtkinter.CTkFrame(compression_row, fg_color="transparent")
+    compression_text_col.pack(side="left", fill="x", expand=True)
+    customtkinter.CTkLabel(
+        compression_text_col, text="Save file compression",
+        font=FONT_BODY, text_color=TEXT, anchor="w",
+    ).pack(anchor="w")
+    customtkinter.CTkLabel(
+        compression_text_col,
+        text="Shrinks save.json several times over. \"auto\" uses zstd when it is installed,\notherwise saves uncompressed. Only applies to \"json\" storage.",
+        font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w", justify="left",
+    ).pack(anchor="w", pady=(2, 0))
+
+    if settings.get("save_compression") not in SAVE_COMPRESSIONS:
+        settings["save_compression"] = "auto"
+
+    def _switch_save_compression(compression: str) -> None:
+        settings["save_compression"] = compression
+        set_save_compression(compression)
+        save_data(data, ("setting", "save_compression"))
+
+    compression_var = customtkinter.StringVar(value=settings["save_compression"])
+    customtkinter.CTkOptionMenu(
+        compression_row,
+        variable=compression_var,
+        values=list(SAVE_COMPRESSIONS),
+        width=140,
+        height=30,
+        fg_color=PINK_LIGHT,
+        button_color=PINK_MID,
+        button_hover_color=PINK,
+        dropdown_fg_color=CARD_BG,
+        dropdown_hover_color=PINK_LIGHT,
+        dropdown_text_color=TEXT,
+        text_color=PINK_DARK,
+        font=("Nunito", 12, "bold"),
+        corner_radius=20,
+        command=_switch_save_compression,
+    ).pack(side="right")
+
+    backup_card = customtkinter.CTkFrame(scroll, fg_color=CARD_BG, border_width=1, border_color=BORDER, corner_radius=14)
+    backup_card.pack(fill="x", pady=(0, 8))
+
+    backup_row = customtkinter.CTkFrame(backup_card, fg_color="transparent")
+    backup_row.pack(fill="x", padx=16, pady=14)
+
+    backup_text_col = customtkinter.CTkFrame(backup_row, fg_color="transparent")
+    backup_text_col.pack(side="left", fill="x", expand=True)
+    customtkinter.CTkLabel(
+        backup_text_col, text="Backups",
+        font=FONT_BODY, text_color=TEXT, anchor="w",
+    ).pack(anchor="w")
+    customtkinter.CTkLabel(
+        backup_text_col,
+        text=(
+            f"Keeps the {BACKUP_COUNT} most recent compressed copies of your save, taken in the\n"
+            f"background at most every {BACKUP_INTERVAL_SECONDS // 60} minutes. Restored automatically if the save can't be read."
+        ),
+        font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w", justify="left",
+    ).pack(anchor="w", pady=(2, 0))
+
+    def _backup_stats_text() -> str:
+        stats = get_backup_stats()
+        if stats["latest"] is None:
+            text = "No backups yet."
+        else:
+            latest = time.strftime("%Y-%m-%d %H:%M", time.localtime(stats["latest"]))
+            text = f"{stats['count']} backups, latest {latest}."
+        if stats["last_error"]:
+            text += f" Last backup failed: {stats['last_error']}"
+        if stats["restored_from"]:
+            text += f"\nRestored at startup from {os.path.basename(stats['restored_from'])}."
+        return text
+
+    backup_stats_label = customtkinter.CTkLabel(
+        backup_text_col,
+        text=_backup_stats_text(),
+        font=FONT_SMALL, text_color=TEXT_MUTED, anchor="w", justify="left",
+    )
+    backup_stats_label.pack(anchor="w", pady=(4, 0))
+    backup_stats_label.bind("<Map>", lambda _e: backup_stats_label.configure(text=_backup_stats_text()))
+
+    def _backup_now() -> None:
+        create_backup()
+        backup_stats_label.configure(text=_backup_stats_text())
+
+    def _open_backup_folder() -> None:
+        backup_dir = get_backup_dir()
+        try:
+            os.makedirs(backup_dir, exist_ok=True)
+            if sys.platform.startswith("win"):
+                os.startfile(backup_dir)
+            elif sys.platform == "darwin":
+                subprocess.run(["open", backup_dir], check=True)
+            else:
+                subprocess.run(["xdg-open", backup_dir], check=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            traceback.print_exc()
+            _show_cache_error_popup("Open backup folder failed", f"Failed to open backup folder:\n{e}")
+
+    backup_actions_row = customtkinter.CTkFrame(backup_text_col, fg_color="transparent")
+    backup_actions_row.pack(anchor="w", pady=(4, 0))
+
+    customtkinter.CTkButton(
+        backup_actions_row,
+        text="Back up now",
+        width=120, height=28,
+        fg_color=PINK_LIGHT, hover_color=PINK,
+        text_color=PINK_DARK, font=("Nunito", 12, "bold"),
+        corner_radius=20,
+        command=_backup_now,
+    ).pack(side="left")
+
+    customtkinter.CTkButton(
+        backup_actions_row,
+        text="Open backup folder",
+        width=160, height=28,
+        fg_color=PINK_LIGHT, hover_color=PINK,
+        text_color=PINK_DARK, font=("Nunito", 12, "bold"),
+        corner_radius=20,
+        command=_open_backup_folder,
+    ).pack(side="left", padx=(8, 0))
+
     # ── Danger zone ──────── (SAVE FILE RESET IS HERE) ─────────────────────────────────────────
     customtkinter.CTkLabel(
         scroll, text="DANGER ZONE",
@@ -648,7 +994,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
     ).pack(anchor="w")
     customtkinter.CTkLabel(
         danger_text_col,
-        text="Deletes all categories, VN entries, notes, and settings.\nThis cannot be undone.",
+        text="Deletes all categories, VN entries, notes, and settings.\nA backup is taken first (see Backups above).",
         font=FONT_SMALL, text_color=TEXT_DANGER, anchor="w", justify="left",
     ).pack(anchor="w", pady=(2, 0))
 
@@ -672,7 +1018,7 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
 
         customtkinter.CTkLabel(
             popup,
-            text="All categories, VN entries, notes, and settings will be deleted.\nThe app will restart immediately after reset.",
+            text="All categories, VN entries, notes, and settings will be deleted.\nA backup is kept in the backups folder. The app will restart immediately after reset.",
             font=FONT_SMALL,
             text_color=TEXT,
             wraplength=390,
@@ -686,9 +1032,16 @@ def build_settings(parent, data: dict) -> customtkinter.CTkScrollableFrame:
             new_data = reset_data()
             data.clear()
             data.update(new_data)
+            library_data.attach_index(data)
             popup.destroy()
             subprocess.Popen([sys.executable, *sys.argv])
-            popup.after(300, lambda: os._exit(0))
+            # The backup of the old library is still being written on its own thread
+            popup.after(300, lambda: threading.Thread(target=_exit_after_backup, daemon=True).start())
+
+        def _exit_after_backup() -> None:
+            wait_for_backups()
+            close_cover_index()
+            os._exit(0)
 
         customtkinter.CTkButton(
             btn_frame,
@@ -5,16 +5,17 @@ import traceback
 import time
 import sys
 
-from app.api.vndb import search_vns, search_tags
+from app.api.vndb import search_vns, search_tags, API_POOL_SIZE
 from app.ui.search.vn_detail import open_vn_detail
-from app.utils.image import load_image_from_url, submit_image_task, async_load_with_hover, cover_size_for_width
+from app.utils.image import load_image_from_url, submit_image_task, async_load_with_hover, get_hover_image, cover_size_for_width, prefetch_covers
 from app.utils.text import clean_description
 from app.ui.shared.components import render_tags, logical_width
 from app.utils.save import save_data
+from app.utils import library_data
 
 from app.ui.shared.theme import *
 
-_search_executor = ThreadPoolExecutor(max_workers=2)
+_search_executor = ThreadPoolExecutor(max_workers=API_POOL_SIZE)
 WINDOWS_RESIZE_DEBOUNCE_MS = 320
 DEFAULT_RESIZE_DEBOUNCE_MS = 200
 DEFAULT_FAST_RESULTS_SCROLL_UNITS = 100
@@ -22,7 +23,8 @@ DEFAULT_FAST_RESULTS_SCROLL_UNITS = 100
 def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> None:
     """
     Opens a Toplevel window that lets the user search VnDB and browse results
-    in either list or grid view.
+    in either list or grid view. on_vn_added(category, vn_id) is called after
+    the user adds a VN to one of their categories.
     """
     window = customtkinter.CTkToplevel(parent)
     window.title("Search a Visual Novel from VnDB database...")
@@ -60,7 +62,7 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
     MAX_RENDERED_RESULTS = 120
 
     def _get_vn_categories(vn_id: str) -> list[str]:
-        return [cat for cat, vns in data.get("vns", {}).items() if any(v["id"] == vn_id for v in vns)]
+        return library_data.vn_categories(data, vn_id)
 
     #___________Header__________
     
@@ -85,7 +87,7 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
             text_color=WHITE if settings["allow_suggestive"] else PINK_DARK,
             hover_color=PINK_ACCENT_HOVER if settings["allow_suggestive"] else PINK_MID
             ),
-        save_data(data)
+        save_data(data, ("setting", "allow_suggestive"))
         if last_results:
             render_results(last_results)
 
@@ -96,7 +98,7 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
             text_color=WHITE if settings["allow_explicit"] else PINK_DARK,
             hover_color=PINK_ACCENT_HOVER if settings["allow_explicit"] else PINK_MID
             )
-        save_data(data)
+        save_data(data, ("setting", "allow_explicit"))
         if last_results:
             render_results(last_results)
 
@@ -505,6 +507,11 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
         future = submit_image_task(async_load_with_hover, label, url, size, images, "search")
         image_futures.append(future)
 
+    def _prefetch_page(api_data: list) -> None:
+        urls = [(vn.get("image") or {}).get("url", "") for vn in api_data]
+        cover_size = cover_size_for_width(window.winfo_width(), "list" if view_mode.get() == "list" else "grid")
+        image_futures.extend(prefetch_covers(urls, "search", size=cover_size))
+
     def _cancel_image_tasks():
         futures = list(image_futures)
         image_futures.clear()
@@ -586,15 +593,12 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
 
         def confirm():
             cat = var.get()
-            vns_in_cat = data["vns"].setdefault(cat, [])
-            added = not any(v["id"] == vn["id"] for v in vns_in_cat)
+            added = library_data.add_vn(data, cat, vn)
             if added:
-                vn["added_at"] = time.time()
-                vns_in_cat.append(vn)
-                save_data(data)
+                save_data(data, ("add_vn", cat, vn["id"]))
             popup.destroy()
             if added and on_vn_added:
-                window.after(300, on_vn_added)
+                window.after(300, lambda: on_vn_added(cat, vn["id"]))
 
         customtkinter.CTkButton(popup, 
         text="+ Add", 
@@ -638,6 +642,7 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
             filtered_data = filtered_data[:MAX_RENDERED_RESULTS]
             _render_limit_reached[0] = True
 
+        _prefetch_page(filtered_data)
         if view_mode.get() == "list":
             _grid_columns[0] = None
             _render_list(filtered_data, _render_gen[0], start_index=0)
@@ -679,10 +684,11 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
                 if img_url:
                     _submit_image_hover(img_label, img_url, cover_size, _images)
 
-                def on_enter(_e, lbl=img_label, imgs=_images, cf=cover_frame):
+                def on_enter(_e, lbl=img_label, imgs=_images, cf=cover_frame, u=img_url, s=cover_size):
                     cf.configure(fg_color=COVER_HOVER_BG)
-                    if imgs["dimmed"]:
-                        lbl.configure(image=imgs["dimmed"])
+                    dimmed = get_hover_image(imgs, u, s, "search")
+                    if dimmed:
+                        lbl.configure(image=dimmed)
                 def on_leave(_e, lbl=img_label, imgs=_images, cf=cover_frame):
                     cf.configure(fg_color=PINK_LIGHT)
                     if imgs["normal"]:
@@ -796,10 +802,11 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
                 if img_url:
                     _submit_image_hover(img_label, img_url, cover_size, _images)
 
-                def on_enter(_e, lbl=img_label, imgs=_images, cf=cover_frame):
+                def on_enter(_e, lbl=img_label, imgs=_images, cf=cover_frame, u=img_url, s=cover_size):
                     cf.configure(fg_color=COVER_HOVER_BG)
-                    if imgs["dimmed"]:
-                        lbl.configure(image=imgs["dimmed"])
+                    dimmed = get_hover_image(imgs, u, s, "search")
+                    if dimmed:
+                        lbl.configure(image=dimmed)
                 def on_leave(_e, lbl=img_label, imgs=_images, cf=cover_frame):
                     cf.configure(fg_color=PINK_LIGHT)
                     if imgs["normal"]:
@@ -873,6 +880,7 @@ def open_search_window(parent: customtkinter.CTk, data, on_vn_added = None) -> N
         _render_gen[0] += 1
         gen = _render_gen[0]
         start_index = _rendered_count[0]
+        _prefetch_page(filtered_data)
         if view_mode.get() == "list":
             _render_list(filtered_data, gen, start_index=start_index)
         else:
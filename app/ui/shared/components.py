@@ -9,6 +9,10 @@ def set_low_perf_mode(enabled: bool) -> None:
     _low_perf[0] = enabled
 
 
+def is_low_perf_mode() -> bool:
+    return _low_perf[0]
+
+
 def logical_width(widget) -> int:
     """
     Returns the widget's width in logical pixels, correcting for Windows DPI scaling.
@@ -0,0 +1,266 @@
+import os
+import shutil
+import sys
+import threading
+import time
+
+from app.utils import library_data
+from app.utils.storage import JsonStorage, available_compressions, content_digest, write_lines
+
+# Rotating backups of the save, kept as compressed JSON snapshots in a
+# "backups" folder next to it. A background thread takes one after a
+# successful save once BACKUP_INTERVAL_SECONDS have passed since the last one,
+# and keeps the BACKUP_COUNT most recent. Any of them can be loaded with
+# JsonStorage, whatever backend the save itself uses.
+BACKUP_COUNT = 5
+BACKUP_INTERVAL_SECONDS = 10 * 60
+_BACKUP_PREFIX = "save-"
+
+
+def _compression() -> str:
+    return "zstd" if "zstd" in available_compressions() else "gzip"
+
+
+def list_backups(backup_dir: str) -> list[str]:
+    """
+    Returns the paths of the backups in backup_dir, newest first.
+    """
+    try:
+        names = [
+            name for name in os.listdir(backup_dir)
+            if name.startswith(_BACKUP_PREFIX) and not name.endswith(".tmp")
+        ]
+    except OSError:
+        return []
+    # Names embed a sortable timestamp
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def write_backup(lines: list, backup_dir: str) -> str:
+    """
+    Writes snapshot lines (see JsonStorage.export_snapshot()) to a new
+    compressed backup file and checks that it reads back identically before it
+    replaces anything; then drops all but the BACKUP_COUNT newest backups.
+    Returns the new backup's path.
+    Raises OSError or ValueError if it can't be written or verified.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    compression = _compression()
+    extension = "zst" if compression == "zstd" else "gz"
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}"
+    path = os.path.join(backup_dir, f"{_BACKUP_PREFIX}{stamp}.json.{extension}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        digest = write_lines(f, lines, compression)
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        if content_digest(tmp_path) != digest:
+            raise ValueError("backup did not read back intact")
+    except ValueError:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    for old in list_backups(backup_dir)[BACKUP_COUNT:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+def load_latest_backup(backup_dir: str) -> tuple[dict, str] | None:
+    """
+    Loads the newest backup that reads back completely, VN bodies included.
+    Returns (data, path), or None if no backup is usable.
+    """
+    for path in list_backups(backup_dir):
+        try:
+            data = JsonStorage(path).load()
+            library_data.load_vns(data)
+        except (OSError, ValueError) as e:
+            print(f"[VnManager] Skipping unreadable backup {path}: {e}", file=sys.stderr)
+            continue
+        vns = data.get("vns", {})
+        if any(entry["id"] not in vns for entries in data.get("lists", {}).values() for entry in entries):
+            print(f"[VnManager] Skipping incomplete backup {path}", file=sys.stderr)
+            continue
+        return data, path
+    return None
+
+
+class BackupWorker:
+    """
+    Background thread that backs up the save after successful writes.
+    copy_source(tmp_dir) copies the current save files into tmp_dir while no
+    save is being written and returns a storage object opened on the copies
+    (or None if there is nothing saved yet). Everything after that copy
+    (export, compression, verification, rotation) happens on this thread, so
+    saves only ever wait for the file copy.
+    """
+
+    def __init__(self, backup_dir: str, copy_source):
+        self.backup_dir = backup_dir
+        self._copy_source = copy_source
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pending = False
+        self._running = False
+        # (tmp_dir, storage) copied by backup_soon() for the thread to export
+        self._copied = None
+        self._last_backup = None
+        self.taken = 0
+        self.last_error = None
+        self.last_seconds = 0.0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is None:
+                backups = list_backups(self.backup_dir)
+                if backups:
+                    try:
+                        self._last_backup = os.path.getmtime(backups[0])
+                    except OSError:
+                        pass
+                self._thread = threading.Thread(target=self._run, name="save-backup", daemon=True)
+                self._thread.start()
+
+    def saved(self) -> None:
+        """
+        Called after every successful save; only wakes the thread up.
+        """
+        with self._cond:
+            self._pending = True
+            self._cond.notify_all()
+
+    def _due(self) -> float:
+        if self._last_backup is None:
+            return 0.0
+        return max(0.0, self._last_backup + BACKUP_INTERVAL_SECONDS - time.time())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending or self._running:
+                    self._cond.wait()
+                copied, self._copied = self._copied, None
+                wait = self._due() if copied is None else 0
+                if wait > 0:
+                    # Leave the request pending until the interval is up
+                    self._cond.wait(wait)
+                    continue
+                self._pending = False
+                self._running = True
+            try:
+                self._backup(copied)
+            finally:
+                with self._cond:
+                    self._running = False
+                    self._cond.notify_all()
+
+    def _backup(self, copied=None) -> str | None:
+        started = time.perf_counter()
+        error = None
+        path = None
+        if copied is None:
+            tmp_dir = os.path.join(self.backup_dir, ".source")
+        else:
+            tmp_dir, source = copied
+        try:
+            if copied is None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                os.makedirs(tmp_dir, exist_ok=True)
+                source = self._copy_source(tmp_dir)
+            if source is not None:
+                try:
+                    lines = source.export_snapshot()
+                finally:
+                    source.close()
+                path = write_backup(lines, self.backup_dir)
+        except Exception as e:
+            # Anything, so one bad backup doesn't end the thread for the session
+            error = str(e) or type(e).__name__
+            print(f"[VnManager] Backup failed: {e!r}", file=sys.stderr)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        with self._cond:
+            self.last_error = error
+            if path is not None:
+                self.taken += 1
+                self._last_backup = time.time()
+                self.last_seconds = time.perf_counter() - started
+        return path
+
+    def backup_now(self) -> str | None:
+        """
+        Takes a backup on the calling thread, after any running one, regardless
+        of the interval. Returns its path, or None if it failed or there was
+        nothing to back up.
+        """
+        with self._cond:
+            while self._running:
+                self._cond.wait()
+            self._running = True
+        try:
+            return self._backup()
+        finally:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+    def backup_soon(self) -> None:
+        """
+        Copies the save files on the calling thread and leaves the rest of the
+        backup to the background thread, regardless of the interval. The save
+        can be replaced as soon as this returns.
+        """
+        self.start()
+        with self._cond:
+            while self._running or self._copied is not None:
+                self._cond.wait()
+            self._running = True
+        tmp_dir = os.path.join(self.backup_dir, ".copied")
+        source = None
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir, exist_ok=True)
+            source = self._copy_source(tmp_dir)
+        except Exception as e:
+            print(f"[VnManager] Backup failed: {e!r}", file=sys.stderr)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            with self._cond:
+                self.last_error = str(e) or type(e).__name__
+        finally:
+            with self._cond:
+                self._running = False
+                if source is not None:
+                    self._copied = (tmp_dir, source)
+                    self._pending = True
+                self._cond.notify_all()
+
+    def wait(self) -> None:
+        """
+        Blocks until no backup is running and none copied by backup_soon() is
+        still waiting to be written.
+        """
+        with self._cond:
+            while self._running or self._copied is not None:
+                self._cond.wait()
+
+    def stats(self) -> dict:
+        backups = list_backups(self.backup_dir)
+        latest = None
+        if backups:
+            try:
+                latest = os.path.getmtime(backups[0])
+            except OSError:
+                pass
+        with self._cond:
+            return {
+                "count": len(backups),
+                "latest": latest,
+                "taken": self.taken,
+                "last_seconds": self.last_seconds,
+                "last_error": self.last_error,
+            }
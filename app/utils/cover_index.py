@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Bump when the table layout changes; the index is rebuilt from the directory.
+_INDEX_VERSION = 2
+_TOUCH_FLUSH_THRESHOLD = 64
+
+# Derived thumbnails share the cache directory, prefixed so a rebuild can tell them apart.
+THUMB_PREFIX = "t_"
+
+
+class CoverIndex:
+    """
+    Persistent index of the files in the cover cache directory.
+    Tracks size, kind ("cover" or "thumb") and last access time per file in a
+    small SQLite table so LRU eviction and cache stats never have to list or
+    stat the whole directory. File count limits apply to covers only; the
+    byte budget covers both kinds.
+    The index is opened lazily and rebuilt from a one-time directory scan when
+    it is missing or out of date.
+    """
+
+    def __init__(self, cache_dir: str, index_path: str):
+        self.cache_dir = cache_dir
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._count = 0
+        self._total_bytes = 0
+        self._pending_touches: dict[str, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != _INDEX_VERSION:
+            conn.execute("DROP TABLE IF EXISTS covers")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS covers ("
+            " name TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS covers_last_access ON covers (last_access)")
+        self._conn = conn
+        if version != _INDEX_VERSION:
+            self._rebuild()
+            conn.execute(f"PRAGMA user_version = {_INDEX_VERSION}")
+        elif not os.path.isdir(self.cache_dir):
+            with conn:
+                conn.execute("DELETE FROM covers")
+        self._count, self._total_bytes = conn.execute(
+            "SELECT COUNT(CASE WHEN kind = 'cover' THEN 1 END), COALESCE(SUM(size), 0) FROM covers"
+        ).fetchone()
+        return conn
+
+    def _rebuild(self) -> None:
+        rows = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file(follow_symlinks=False):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    kind = "thumb" if entry.name.startswith(THUMB_PREFIX) else "cover"
+                    rows.append((entry.name, st.st_size, kind, st.st_mtime))
+        except OSError:
+            pass
+        with self._conn:
+            self._conn.execute("DELETE FROM covers")
+            self._conn.executemany("INSERT INTO covers VALUES (?, ?, ?, ?)", rows)
+
+    def _flush_touches(self) -> None:
+        if not self._pending_touches:
+            return
+        touches = [(t, name) for name, t in self._pending_touches.items()]
+        self._pending_touches.clear()
+        with self._conn:
+            self._conn.executemany("UPDATE covers SET last_access = ? WHERE name = ?", touches)
+
+    def record(self, name: str, size: int, kind: str = "cover") -> None:
+        """
+        Records a newly written file, replacing any previous entry for it.
+        """
+        with self._lock:
+            conn = self._connect()
+            self._pending_touches.pop(name, None)
+            row = conn.execute("SELECT size, kind FROM covers WHERE name = ?", (name,)).fetchone()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO covers VALUES (?, ?, ?, ?)", (name, size, kind, time.time()))
+            if row is not None:
+                self._total_bytes -= row[0]
+                if row[1] == "cover":
+                    self._count -= 1
+            if kind == "cover":
+                self._count += 1
+            self._total_bytes += size
+
+    def touch(self, name: str) -> None:
+        """
+        Marks a file as just used. Touches are batched to keep cache hits cheap.
+        """
+        with self._lock:
+            self._connect()
+            self._pending_touches[name] = time.time()
+            if len(self._pending_touches) >= _TOUCH_FLUSH_THRESHOLD:
+                self._flush_touches()
+
+    def pop_oldest(self, max_files: int, max_bytes: int) -> list[str]:
+        """
+        Removes the least recently used entries until at most max_files covers
+        remain and all files take up at most max_bytes. Returns the removed file
+        names so the caller can delete them.
+        """
+        with self._lock:
+            conn = self._connect()
+            max_files = max(0, max_files)
+            if self._count <= max_files and self._total_bytes <= max_bytes:
+                return []
+            self._flush_touches()
+            removed = []
+            cursor = conn.execute("SELECT name, size, kind FROM covers ORDER BY last_access")
+            for name, size, kind in cursor:
+                over_count = self._count > max_files
+                over_bytes = self._total_bytes > max_bytes
+                if not over_count and not over_bytes:
+                    break
+                if kind != "cover" and not over_bytes:
+                    continue
+                removed.append(name)
+                if kind == "cover":
+                    self._count -= 1
+                self._total_bytes -= size
+            cursor.close()
+            with conn:
+                conn.executemany("DELETE FROM covers WHERE name = ?", [(name,) for name in removed])
+            return removed
+
+    def stats(self) -> tuple[int, int]:
+        """
+        Returns (cover count, total bytes including thumbnails) without touching
+        the cache directory.
+        """
+        with self._lock:
+            self._connect()
+            return self._count, self._total_bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            self._pending_touches.clear()
+            with conn:
+                conn.execute("DELETE FROM covers")
+            self._count = 0
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_touches()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,138 @@
+import threading
+from io import BytesIO
+from PIL import Image, ImageDraw
+
+# Pure Pillow cover processing. Kept free of Tk/CTk imports so it can run in
+# worker processes as well as threads.
+
+# Covers only come in the few sizes cover_size_for_width hands out, so corner
+# masks and hover overlays are built once per size and reused. Both are read-only
+# once cached. Each worker process keeps its own copy, and sends its hit/miss
+# counts back with every cover it renders.
+_SHAPE_CACHE_MAX = 32
+DIM_ALPHA = 110
+
+_shape_lock = threading.Lock()
+_mask_cache: dict[tuple, Image.Image] = {}
+_overlay_cache: dict[tuple, Image.Image] = {}
+_render_stats = {"mask_hits": 0, "mask_misses": 0, "overlay_hits": 0, "overlay_misses": 0}
+
+
+def _cached_shape(cache: dict, key: tuple, stat: str, build) -> Image.Image:
+    with _shape_lock:
+        shape = cache.get(key)
+        if shape is not None:
+            _render_stats[f"{stat}_hits"] += 1
+            return shape
+        _render_stats[f"{stat}_misses"] += 1
+    shape = build()
+    with _shape_lock:
+        if len(cache) >= _SHAPE_CACHE_MAX:
+            cache.clear()
+        return cache.setdefault(key, shape)
+
+
+def _build_mask(size: tuple[int, int], radius: int) -> Image.Image:
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, *size), radius=radius, fill=255)
+    return mask
+
+
+def get_render_stats() -> dict:
+    """
+    Returns hit/miss counters for the corner mask and hover overlay caches
+    of this process and of the worker processes that reported back (see
+    add_render_stats()).
+    """
+    with _shape_lock:
+        return dict(_render_stats)
+
+
+def add_render_stats(counts: dict) -> None:
+    """
+    Adds the counters a worker process returned from render_cover_rgba to
+    this process's totals.
+    """
+    with _shape_lock:
+        for key, value in counts.items():
+            _render_stats[key] = _render_stats.get(key, 0) + value
+
+
+def decode_cover(data: bytes, size: tuple[int, int]) -> Image.Image:
+    """
+    Decodes cover bytes to RGBA. JPEGs are decoded in draft mode at the smallest
+    1/2, 1/4 or 1/8 scale that still covers `size`, so large covers never get
+    decoded at full resolution just to be shrunk right after.
+    """
+    img = Image.open(BytesIO(data))
+    img.draft("RGB", size)
+    return img.convert("RGBA")
+
+
+def resize_to_cover(img: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """
+    Resizes + center-crops an image so it fully fills `size` without stretching.
+    """
+    target_w, target_h = size
+    src_w, src_h = img.size
+
+    if target_w <= 0 or target_h <= 0 or src_w <= 0 or src_h <= 0:
+        return img
+
+    scale = max(target_w / src_w, target_h / src_h)
+    resized_w = max(1, int(round(src_w * scale)))
+    resized_h = max(1, int(round(src_h * scale)))
+
+    img = img.resize((resized_w, resized_h), Image.BILINEAR)
+
+    left = max(0, (resized_w - target_w) // 2)
+    top = max(0, (resized_h - target_h) // 2)
+    right = left + target_w
+    bottom = top + target_h
+    return img.crop((left, top, right, bottom))
+
+
+def round_image(img: Image.Image, radius: int) -> Image.Image:
+    """
+    Returns a copy of img with rounded corners, using an alpha mask.
+    """
+    size = img.size
+    mask = _cached_shape(_mask_cache, (size, radius), "mask", lambda: _build_mask(size, radius))
+    result = img.convert("RGBA")
+    result.putalpha(mask)
+    return result
+
+
+def dim_image(img: Image.Image) -> Image.Image:
+    """
+    Returns the darkened hover variant of an RGBA cover.
+    """
+    size = img.size
+    overlay = _cached_shape(
+        _overlay_cache, size, "overlay", lambda: Image.new("RGBA", size, (0, 0, 0, DIM_ALPHA))
+    )
+    return Image.alpha_composite(img, overlay)
+
+
+def render_cover(data: bytes, size: tuple[int, int], radius: int) -> Image.Image:
+    """
+    Decodes, resizes, crops and rounds a cover to exactly `size` pixels.
+    """
+    img = decode_cover(data, size)
+    img = resize_to_cover(img, size)
+    img = round_image(img, radius)
+    img.load()
+    return img
+
+
+def render_cover_rgba(data: bytes, size: tuple[int, int], radius: int) -> tuple[tuple[int, int], bytes, dict]:
+    """
+    Process-pool entry point for render_cover. Returns (size, raw RGBA bytes) so
+    only a flat buffer crosses the process boundary, plus the shape cache
+    counters of this call for the parent to add to its own.
+    """
+    # Pool workers render one cover at a time, so the difference is this call's
+    before = get_render_stats()
+    img = render_cover(data, size, radius)
+    after = get_render_stats()
+    return img.size, img.tobytes(), {key: after[key] - before[key] for key in after}
@@ -1,26 +1,99 @@
 import os
 import sys
 import hashlib
+import sqlite3
 import threading
+import multiprocessing
 from collections import OrderedDict
 import requests
 import customtkinter
-from PIL import Image, ImageDraw
+from PIL import Image, features
 from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from requests.adapters import HTTPAdapter
+from app.utils.cover_index import CoverIndex, THUMB_PREFIX
+from app.utils.cover_render import render_cover, render_cover_rgba, dim_image, get_render_stats, add_render_stats
+
+DEFAULT_COVER_CONNECTIONS = 4
+
+_cover_pool_size = [DEFAULT_COVER_CONNECTIONS]
+_download_slots = [threading.BoundedSemaphore(DEFAULT_COVER_CONNECTIONS)]
+
+
+def _make_cover_adapter(pool_size: int) -> HTTPAdapter:
+    return HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
 
-_session = requests.Session()
-_session.headers.update({
-    "User-Agent": "VnManager/1.0",
-    "Connection": "close",
-})
 
-_executor = ThreadPoolExecutor(max_workers=2)
+_session = requests.Session()
+_session.headers.update({"User-Agent": "VnManager/1.0"})
+_session.mount("https://", _make_cover_adapter(DEFAULT_COVER_CONNECTIONS))
+_session.mount("http://", _make_cover_adapter(DEFAULT_COVER_CONNECTIONS))
+
+_IMAGE_WORKERS = 2
+_executor = ThreadPoolExecutor(max_workers=_IMAGE_WORKERS)
+_fetch_executor = [ThreadPoolExecutor(max_workers=DEFAULT_COVER_CONNECTIONS)]
+_downloads: dict[str, Future] = {}
+_fetch_stats = {"downloads": 0, "deduplicated": 0}
 _cache_lock = threading.Lock()
-_bytes_cache: OrderedDict[str, bytes] = OrderedDict()
-_image_cache: OrderedDict[tuple, customtkinter.CTkImage] = OrderedDict()
-_bytes_cache_max = [256]
-_image_cache_max = [200]
+_MB = 1024 * 1024
+DEFAULT_COVER_CACHE_MB = 300
+DEFAULT_MEMORY_CACHE_MB = 256
+
+
+class _LRUCache:
+    """
+    LRU mapping bounded both by entry count and by total footprint in bytes.
+    Not locked on its own; the module helpers below hold _cache_lock.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, weigh):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._weigh = weigh
+        self._entries: OrderedDict = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value) -> None:
+        if self.max_entries <= 0 or self.max_bytes <= 0:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= self._weigh(old)
+        self._entries[key] = value
+        self.total_bytes += self._weigh(value)
+        self.trim()
+
+    def trim(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, value = self._entries.popitem(last=False)
+            self.total_bytes -= self._weigh(value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+
+def _image_footprint(image: customtkinter.CTkImage) -> int:
+    # Decoded RGBA buffer plus the Tk photo CTk renders from it at roughly the same size
+    width, height = image.cget("light_image").size
+    return width * height * 4 * 2
+
+
+_bytes_cache = _LRUCache(256, DEFAULT_MEMORY_CACHE_MB * _MB // 4, len)
+_image_cache = _LRUCache(200, DEFAULT_MEMORY_CACHE_MB * _MB - DEFAULT_MEMORY_CACHE_MB * _MB // 4, _image_footprint)
 _cache_main_only = [False]
 
 
@@ -34,6 +107,10 @@ def _get_cover_cache_dir() -> str:
 
 
 _COVER_CACHE_DIR = _get_cover_cache_dir()
+_cover_index = CoverIndex(
+    _COVER_CACHE_DIR,
+    os.path.join(os.path.dirname(_COVER_CACHE_DIR), "cover_index.sqlite3"),
+)
 
 
 def _url_to_cache_path(url: str) -> str:
@@ -41,13 +118,105 @@ def _url_to_cache_path(url: str) -> str:
     return os.path.join(_COVER_CACHE_DIR, filename)
 
 
+# Ready-to-display thumbnails (resized, rounded, optionally dimmed) keyed like _image_cache.
+# WebP keeps alpha and is several times smaller than PNG for covers.
+_THUMB_FORMAT = "WEBP" if features.check("webp") else "PNG"
+
+
+def _thumb_cache_path(cache_key: tuple) -> str:
+    filename = THUMB_PREFIX + hashlib.md5(repr(cache_key).encode()).hexdigest()
+    return os.path.join(_COVER_CACHE_DIR, filename)
+
+
 _cover_cache_max = [500]
+_cover_cache_max_bytes = [DEFAULT_COVER_CACHE_MB * _MB]
 
 
 def set_cover_cache_max(limit: int) -> None:
     _cover_cache_max[0] = limit
 
 
+def set_cover_cache_max_mb(limit_mb: int) -> None:
+    """
+    Sets the max total size of the on-disk cover cache, in MB.
+    """
+    _cover_cache_max_bytes[0] = max(1, int(limit_mb)) * _MB
+
+
+def set_cover_download_limits(pool_size: int, max_concurrent: int) -> None:
+    """
+    Sets how many keep-alive connections the cover session keeps open and how many
+    cover downloads may run at once. Downloads already running finish on the old limits.
+    """
+    pool_size = max(1, int(pool_size))
+    max_concurrent = max(1, int(max_concurrent))
+    _cover_pool_size[0] = pool_size
+    for prefix in ("https://", "http://"):
+        old_adapter = _session.adapters.get(prefix)
+        _session.mount(prefix, _make_cover_adapter(pool_size))
+        if old_adapter is not None:
+            old_adapter.close()
+    _download_slots[0] = threading.BoundedSemaphore(max_concurrent)
+    old_executor = _fetch_executor[0]
+    _fetch_executor[0] = ThreadPoolExecutor(max_workers=max_concurrent)
+    old_executor.shutdown(wait=False)
+
+
+IMAGE_BACKENDS = ("auto", "thread", "process")
+_image_backend = ["auto"]
+_process_pool = [None]
+_process_pool_lock = threading.Lock()
+
+
+def set_image_backend(backend: str) -> None:
+    """
+    Chooses where covers are decoded, resized and rounded:
+    "thread" runs it on the image worker threads, "process" on a small process
+    pool that hands back raw RGBA buffers (keeps that work off the GIL the Tk
+    loop needs), and "auto" picks processes on machines with 4+ cores.
+    """
+    _image_backend[0] = backend if backend in IMAGE_BACKENDS else "auto"
+    if not _use_process_pool():
+        shutdown_process_pool()
+
+
+def _use_process_pool() -> bool:
+    backend = _image_backend[0]
+    if backend == "auto":
+        return (os.cpu_count() or 1) >= 4
+    return backend == "process"
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    with _process_pool_lock:
+        if _process_pool[0] is None:
+            # spawn, not fork: the parent has Tk and worker threads running
+            _process_pool[0] = ProcessPoolExecutor(
+                max_workers=_IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool[0]
+
+
+def shutdown_process_pool() -> None:
+    with _process_pool_lock:
+        pool = _process_pool[0]
+        _process_pool[0] = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def close_cover_index() -> None:
+    """
+    Writes the batched cover access times to the cache index and closes it.
+    Call before the app exits.
+    """
+    try:
+        _cover_index.close()
+    except sqlite3.Error:
+        pass
+
+
 def set_cache_main_only(enabled: bool) -> None:
     _cache_main_only[0] = bool(enabled)
 
@@ -56,46 +225,46 @@ def set_memory_cache_max(limit: int) -> None:
     """
     Sets the max number of in-memory byte entries to keep (LRU).
     """
-    _bytes_cache_max[0] = max(0, int(limit))
-    _trim_cache(_bytes_cache, _bytes_cache_max[0])
+    _bytes_cache.max_entries = max(0, int(limit))
+    _trim_cache(_bytes_cache)
 
 
 def set_image_cache_max(limit: int) -> None:
     """
     Sets the max number of in-memory image entries to keep (LRU).
     """
-    _image_cache_max[0] = max(0, int(limit))
-    _trim_cache(_image_cache, _image_cache_max[0])
+    _image_cache.max_entries = max(0, int(limit))
+    _trim_cache(_image_cache)
 
 
-def _trim_cache(cache: OrderedDict, max_size: int) -> None:
-    if max_size <= 0:
-        with _cache_lock:
-            cache.clear()
-        return
+def set_memory_cache_budget_mb(limit_mb: int) -> None:
+    """
+    Sets the total memory, in MB, the in-memory cover caches may use.
+    A quarter goes to raw downloaded bytes, the rest to decoded images.
+    """
+    budget = max(0, int(limit_mb)) * _MB
+    _bytes_cache.max_bytes = budget // 4
+    _image_cache.max_bytes = budget - budget // 4
+    _trim_cache(_bytes_cache)
+    _trim_cache(_image_cache)
+
+
+def _trim_cache(cache: _LRUCache) -> None:
     with _cache_lock:
-        while len(cache) > max_size:
-            cache.popitem(last=False)
+        if cache.max_entries <= 0 or cache.max_bytes <= 0:
+            cache.clear()
+        else:
+            cache.trim()
 
 
-def _lru_get(cache: OrderedDict, key):
+def _lru_get(cache: _LRUCache, key):
     with _cache_lock:
-        if key not in cache:
-            return None
-        value = cache.pop(key)
-        cache[key] = value
-        return value
+        return cache.get(key)
 
 
-def _lru_set(cache: OrderedDict, key, value, max_size: int) -> None:
-    if max_size <= 0:
-        return
+def _lru_set(cache: _LRUCache, key, value) -> None:
     with _cache_lock:
-        if key in cache:
-            cache.pop(key)
-        cache[key] = value
-        while len(cache) > max_size:
-            cache.popitem(last=False)
+        cache.set(key, value)
 
 
 def _allow_memory_cache(cache_context: str) -> bool:
@@ -106,76 +275,205 @@ def _image_cache_key(url: str, size: tuple[int, int], radius: int, variant: str)
     return (url, int(size[0]), int(size[1]), int(radius), variant)
 
 
-def _resize_to_cover(img: Image.Image, size: tuple[int, int]) -> Image.Image:
+def _evict_oldest(max_files: int, max_bytes: int) -> None:
+    try:
+        names = _cover_index.pop_oldest(max_files, max_bytes)
+    except sqlite3.Error:
+        return
+    for name in names:
+        try:
+            os.remove(os.path.join(_COVER_CACHE_DIR, name))
+        except OSError:
+            pass
+
+
+def get_cover_cache_stats() -> tuple[int, int]:
     """
-    Resizes + center-crops an image so it fully fills `size` without stretching.
+    Returns (cached cover count, total bytes on disk), read from the cache index.
     """
-    target_w, target_h = size
-    src_w, src_h = img.size
+    try:
+        return _cover_index.stats()
+    except sqlite3.Error:
+        return 0, 0
 
-    if target_w <= 0 or target_h <= 0 or src_w <= 0 or src_h <= 0:
-        return img
 
-    scale = max(target_w / src_w, target_h / src_h)
-    resized_w = max(1, int(round(src_w * scale)))
-    resized_h = max(1, int(round(src_h * scale)))
+def clear_cover_cache() -> None:
+    """
+    Deletes every cached cover file and empties the cache index.
+    Raises OSError if the cache directory can't be cleared.
+    """
+    try:
+        _cover_index.clear()
+    except sqlite3.Error:
+        pass
+    if not os.path.isdir(_COVER_CACHE_DIR):
+        return
+    for f in os.listdir(_COVER_CACHE_DIR):
+        file_path = os.path.join(_COVER_CACHE_DIR, f)
+        if os.path.isfile(file_path):
+            os.remove(file_path)
 
-    img = img.resize((resized_w, resized_h), Image.BILINEAR)
 
-    left = max(0, (resized_w - target_w) // 2)
-    top = max(0, (resized_h - target_h) // 2)
-    right = left + target_w
-    bottom = top + target_h
-    return img.crop((left, top, right, bottom))
+def _download(url: str) -> bytes:
+    """
+    Downloads a cover over the pooled session, holding one of the download slots
+    so a page of covers drains over a few persistent connections.
+    """
+    with _download_slots[0]:
+        response = _session.get(url, timeout=5)
+    response.raise_for_status()
+    with _cache_lock:
+        _fetch_stats["downloads"] += 1
+    return response.content
 
 
-def _evict_oldest(max_files: int) -> None:
-    try:
-        files = [
-            os.path.join(_COVER_CACHE_DIR, f)
-            for f in os.listdir(_COVER_CACHE_DIR)
-        ]
-        if len(files) <= max_files:
-            return
-        files.sort(key=lambda p: os.path.getmtime(p))
-        for path in files[:len(files) - max_files]:
-            os.remove(path)
-    except OSError:
-        pass
+def get_fetch_stats() -> dict:
+    """
+    Returns counters for this session: covers downloaded, and fetches that were
+    served by joining a download already in flight for the same URL.
+    """
+    with _cache_lock:
+        return dict(_fetch_stats)
 
 
 def _fetch_bytes(url: str, cache_context: str = "main") -> bytes:
-    should_write_cache = (cache_context == "main") or (not _cache_main_only[0])
-
+    """
+    Returns the bytes for a cover from memory, disk or the network.
+    Concurrent callers for the same URL share one in-flight fetch, so two cards
+    (or a card and the detail popup) never download or write the same file twice.
+    """
     cached = _lru_get(_bytes_cache, url)
     if cached is not None:
         return cached
 
+    with _cache_lock:
+        pending = _downloads.get(url)
+        if pending is None:
+            future = Future()
+            _downloads[url] = future
+
+    if pending is not None:
+        try:
+            data = pending.result()
+        except CancelledError:
+            data = None
+        if data is None:
+            return _load_or_download(url, cache_context)
+        with _cache_lock:
+            _fetch_stats["deduplicated"] += 1
+        return data
+
+    try:
+        data = _load_or_download(url, cache_context)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(data)
+        return data
+    finally:
+        _forget_download(url, future)
+
+
+def _load_or_download(url: str, cache_context: str) -> bytes:
+    should_write_cache = (cache_context == "main") or (not _cache_main_only[0])
+
     cache_path = _url_to_cache_path(url)
     if os.path.exists(cache_path):
         with open(cache_path, "rb") as f:
             data = f.read()
+        try:
+            _cover_index.touch(os.path.basename(cache_path))
+        except sqlite3.Error:
+            pass
         if should_write_cache:
-            _lru_set(_bytes_cache, url, data, _bytes_cache_max[0])
+            _lru_set(_bytes_cache, url, data)
         return data
 
-    response = _session.get(url, timeout=5)
-    response.raise_for_status()
-    data = response.content
+    data = _download(url)
 
     if should_write_cache:
-        _lru_set(_bytes_cache, url, data, _bytes_cache_max[0])
+        _lru_set(_bytes_cache, url, data)
         try:
             os.makedirs(_COVER_CACHE_DIR, exist_ok=True)
             with open(cache_path, "wb") as f:
                 f.write(data)
-            _evict_oldest(_cover_cache_max[0])
-        except OSError:
+            _cover_index.record(os.path.basename(cache_path), len(data))
+            _evict_oldest(_cover_cache_max[0], _cover_cache_max_bytes[0])
+        except (OSError, sqlite3.Error):
             pass
 
     return data
 
 
+def _load_thumb(cache_key: tuple) -> Image.Image | None:
+    """
+    Returns the stored thumbnail for cache_key, or None if there isn't a usable one.
+    """
+    path = _thumb_cache_path(cache_key)
+    try:
+        with Image.open(path) as thumb:
+            img = thumb.convert("RGBA")
+    except (OSError, ValueError):
+        return None
+    try:
+        _cover_index.touch(os.path.basename(path))
+    except sqlite3.Error:
+        pass
+    return img
+
+
+def _save_thumb(cache_key: tuple, img: Image.Image) -> None:
+    path = _thumb_cache_path(cache_key)
+    buf = BytesIO()
+    try:
+        if _THUMB_FORMAT == "WEBP":
+            img.save(buf, "WEBP", quality=90, method=3)
+        else:
+            img.save(buf, "PNG")
+        data = buf.getvalue()
+        os.makedirs(_COVER_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        _cover_index.record(os.path.basename(path), len(data), kind="thumb")
+        _evict_oldest(_cover_cache_max[0], _cover_cache_max_bytes[0])
+    except (OSError, ValueError, sqlite3.Error):
+        pass
+
+
+def _render_cover(url: str, size: tuple[int, int], radius: int, cache_context: str) -> Image.Image:
+    """
+    Returns the rounded 2x cover for url, from the thumbnail tier when possible.
+    Falls back to decoding the original and stores the result as a thumbnail.
+    """
+    cache_key = _image_cache_key(url, size, radius, "normal")
+    img = _load_thumb(cache_key)
+    if img is not None:
+        return img
+    data = _fetch_bytes(url, cache_context=cache_context)
+    fetch_size = (size[0] * 2, size[1] * 2)
+    img = None
+    if _use_process_pool():
+        try:
+            px_size, raw, counts = _get_process_pool().submit(render_cover_rgba, data, fetch_size, radius * 2).result()
+            img = Image.frombytes("RGBA", px_size, raw)
+            add_render_stats(counts)
+        except BrokenProcessPool as e:
+            print(f"[VnManager] Image process pool failed, using threads: {e}", file=sys.stderr)
+            _image_backend[0] = "thread"
+            shutdown_process_pool()
+        except (CancelledError, RuntimeError):
+            # Pool was shut down under us (backend switched); render this one in-thread
+            pass
+    if img is None:
+        img = render_cover(data, fetch_size, radius * 2)
+    if _allow_memory_cache(cache_context):
+        _save_thumb(cache_key, img)
+    return img
+
+
 def load_image_from_url(url, size=(150, 200), radius=10, cache_context: str = "main"):
     """
     Fetches an image from a URL and returns it as a CTkImage.
@@ -192,15 +490,10 @@ def load_image_from_url(url, size=(150, 200), radius=10, cache_context: str = "m
         cached_image = _lru_get(_image_cache, cache_key)
         if cached_image is not None:
             return cached_image
-        data = _fetch_bytes(url, cache_context=cache_context)
-        fetch_size = (size[0] * 2, size[1] * 2)
-        img = Image.open(BytesIO(data)).convert("RGBA")
-        img = _resize_to_cover(img, fetch_size)
-        img = round_image(img, radius * 2)
-        img.load()
+        img = _render_cover(url, size, radius, cache_context)
         ctk_image = customtkinter.CTkImage(img, size=size)
         if _allow_memory_cache(cache_context):
-            _lru_set(_image_cache, cache_key, ctk_image, _image_cache_max[0])
+            _lru_set(_image_cache, cache_key, ctk_image)
         return ctk_image
     except Exception:
         return None
@@ -208,26 +501,54 @@ def load_image_from_url(url, size=(150, 200), radius=10, cache_context: str = "m
 def submit_image_task(fn, *args):
     return _executor.submit(fn, *args)
 
-def round_image(img: Image.Image, radius: int) -> Image.Image:
+
+def prefetch_covers(urls, cache_context: str = "main", size: tuple | None = None, radius: int = 10) -> list:
     """
-    Returns a copy of img with rounded corners, using an alpha mask.
+    Queues downloads for a page of covers on the fetch pool so they stream in over
+    the pooled connections while the image workers decode the ones already fetched.
+    Prefetches join the same in-flight registry as _fetch_bytes.
+    When size is given, covers that already have a thumbnail at that size are
+    skipped, since rendering them never reads the original.
+    Returns the futures so callers can cancel them along with their image tasks.
     """
-    mask = Image.new("L", img.size, 0)
-    draw = ImageDraw.Draw(mask)
-    draw.rounded_rectangle((0, 0, *img.size), radius=radius, fill=255)
-    result = img.convert("RGBA")
-    result.putalpha(mask)
-    return result
+    futures = []
+    executor = _fetch_executor[0]
+    for url in dict.fromkeys(u for u in urls if u):
+        with _cache_lock:
+            if url in _downloads or url in _bytes_cache:
+                continue
+            future = executor.submit(_prefetch_one, url, cache_context, size, radius)
+            _downloads[url] = future
+        future.add_done_callback(lambda f, u=url: _forget_download(u, f))
+        futures.append(future)
+    return futures
+
+
+def _prefetch_one(url: str, cache_context: str, size: tuple | None, radius: int):
+    if size is not None and os.path.exists(_thumb_cache_path(_image_cache_key(url, size, radius, "normal"))):
+        return None
+    if os.path.exists(_url_to_cache_path(url)):
+        return None
+    return _load_or_download(url, cache_context)
+
+
+def _forget_download(url: str, future) -> None:
+    with _cache_lock:
+        if _downloads.get(url) is future:
+            del _downloads[url]
 
 def async_load_with_hover(label, url: str, size: tuple, images: dict, cache_context: str = "main") -> None:
     """
-    Fetches an image at 2x resolution, generates a dimmed version for hover,
-    and applies the normal version to the label. Intended to be run in a thread
-    via submit_image_task. Images are fetched at 2x size for HiDPI sharpness,
-    but CTkImage is told to display at the original logical size.
+    Fetches an image at 2x resolution and applies it to the label. Intended to be
+    run in a thread via submit_image_task. Images are fetched at 2x size for HiDPI
+    sharpness, but CTkImage is told to display at the original logical size.
+    The image is read from the on-disk thumbnail tier when present, which skips
+    decoding the original cover entirely. The dimmed hover variant is not built
+    here; see get_hover_image.
 
-    Populates images["normal"] and images["dimmed"] with CTkImage instances,
-    then schedules a UI update on the main thread via label.after().
+    Populates images["normal"] with a CTkImage instance, then schedules a UI
+    update on the main thread via label.after(). The update is skipped if
+    images["stale"] was set in the meantime (the label was reused for another cover).
 
     Args:
         label:  The CTkLabel to update once the image is loaded.
@@ -236,43 +557,60 @@ def async_load_with_hover(label, url: str, size: tuple, images: dict, cache_cont
         images: Dict with "normal" and "dimmed" keys to populate.
     """
     try:
-        normal_key = _image_cache_key(url, size, 20, "normal")
-        dimmed_key = _image_cache_key(url, size, 20, "dimmed")
+        # Radius is logical (drawn at 2x), matching load_image_from_url so both share entries.
+        normal_key = _image_cache_key(url, size, 10, "normal")
         cached_normal = _lru_get(_image_cache, normal_key)
-        cached_dimmed = _lru_get(_image_cache, dimmed_key)
-        if cached_normal is not None and cached_dimmed is not None:
+        if cached_normal is not None:
             images["normal"] = cached_normal
-            images["dimmed"] = cached_dimmed
             def _apply_cached():
-                if label.winfo_exists():
+                if label.winfo_exists() and not images.get("stale"):
                     label.configure(image=images["normal"], text="")
                     label.image = images["normal"]
             label.after(0, _apply_cached)
             return
-        data = _fetch_bytes(url, cache_context=cache_context)
-        fetch_size = (size[0] * 2, size[1] * 2)
-        img_pil = Image.open(BytesIO(data)).convert("RGBA")
-        img_pil = _resize_to_cover(img_pil, fetch_size)
-        img_pil = round_image(img_pil, 20)
+        img_pil = _render_cover(url, size, 10, cache_context)
     except Exception:
         return
 
-    overlay = Image.new("RGBA", img_pil.size, (0, 0, 0, 110))
-    dimmed_rgba = Image.alpha_composite(img_pil, overlay)
-
     images["normal"] = customtkinter.CTkImage(img_pil, size=size)
-    images["dimmed"] = customtkinter.CTkImage(dimmed_rgba, size=size)
     if _allow_memory_cache(cache_context):
-        _lru_set(_image_cache, normal_key, images["normal"], _image_cache_max[0])
-        _lru_set(_image_cache, dimmed_key, images["dimmed"], _image_cache_max[0])
+        _lru_set(_image_cache, normal_key, images["normal"])
 
     def _apply():
-        if label.winfo_exists():
+        if label.winfo_exists() and not images.get("stale"):
             label.configure(image=images["normal"], text="")
             label.image = images["normal"]
 
     label.after(0, _apply)
 
+
+def get_hover_image(images: dict, url: str, size: tuple, cache_context: str = "main"):
+    """
+    Returns the dimmed hover variant of a cover loaded by async_load_with_hover,
+    building it from the normal image the first time the pointer enters the card.
+    Most covers are never hovered, so this keeps a single image per card in memory.
+    Meant to be called from the UI thread.
+
+    Returns:
+        A CTkImage, or None if the normal image has not loaded yet.
+    """
+    if images.get("dimmed") is not None:
+        return images["dimmed"]
+    normal = images.get("normal")
+    if normal is None:
+        return None
+    dimmed_key = _image_cache_key(url, size, 10, "dimmed")
+    dimmed = _lru_get(_image_cache, dimmed_key)
+    if dimmed is None:
+        try:
+            dimmed = customtkinter.CTkImage(dim_image(normal.cget("light_image")), size=size)
+        except Exception:
+            return None
+        if _allow_memory_cache(cache_context):
+            _lru_set(_image_cache, dimmed_key, dimmed)
+    images["dimmed"] = dimmed
+    return dimmed
+
 def cover_size_for_width(window_width: int, context: str = "card") -> tuple[int, int]:
     """
     Returns a (width, height) cover size scaled to the given window width and render context.
@@ -0,0 +1,471 @@
+import threading
+import time
+from collections.abc import MutableMapping
+
+# Save data keeps every VN once, keyed by VNDB id, and each category as an
+# ordered list of membership entries:
+#   data["vns"]   = {vn_id: {...VNDB fields...}}
+#   data["lists"] = {category: [{"id": vn_id, "added_at": float, "notes": str}, ...]}
+# Per-membership fields (added_at, notes) live on the entry, not on the VN.
+# Loaded saves hold a LazyVns in data["vns"], which reads VN bodies from storage
+# only when they are first needed; it behaves like the plain dict otherwise.
+
+MEMBERSHIP_FIELDS = ("added_at", "notes")
+
+
+class LazyVns(MutableMapping):
+    """
+    data["vns"] for a loaded save: maps each VN id to its VNDB fields, but only
+    decodes a body the first time it is read. Until then the value is the
+    placeholder the storage backend handed in (the raw JSON line, or None when the
+    backend reads bodies itself); load(ids) swaps a batch of placeholders for
+    the decoded dicts with one call to fetch.
+    Membership tests, len() and iterating ids never load anything.
+    """
+
+    def __init__(self, pending: dict, fetch):
+        # fetch({vn_id: placeholder}) -> {vn_id: body}; ids it leaves out are dropped
+        self._bodies = pending
+        self._fetch = fetch
+        self._lock = threading.Lock()
+
+    def load(self, vn_ids) -> None:
+        with self._lock:
+            pending = {}
+            for vn_id in vn_ids:
+                value = self._bodies.get(vn_id, {})
+                if not isinstance(value, dict):
+                    pending[vn_id] = value
+        if not pending:
+            return
+        # fetch runs unlocked: it may wait on the storage backend's own lock
+        bodies = self._fetch(pending)
+        with self._lock:
+            for vn_id in pending:
+                if isinstance(self._bodies.get(vn_id, {}), dict):
+                    # Replaced or removed while fetching
+                    continue
+                if vn_id in bodies:
+                    self._bodies[vn_id] = bodies[vn_id]
+                else:
+                    del self._bodies[vn_id]
+
+    def load_all(self) -> None:
+        self.load(list(self._bodies))
+
+    def copy(self) -> "LazyVns":
+        """
+        Returns a LazyVns over the same bodies and placeholders that later
+        changes to this one don't affect. Nothing is loaded.
+        """
+        with self._lock:
+            return LazyVns(dict(self._bodies), self._fetch)
+
+    def stored_items(self) -> list[tuple]:
+        """
+        Returns (vn_id, body or placeholder) pairs without loading anything, for
+        storage backends that can write placeholders back as they are.
+        """
+        return list(self._bodies.items())
+
+    def stored(self, vn_id: str):
+        """
+        Returns the body or placeholder stored for vn_id without loading it.
+        Raises KeyError if there is none.
+        """
+        return self._bodies[vn_id]
+
+    def loaded_count(self) -> int:
+        return sum(1 for value in list(self._bodies.values()) if isinstance(value, dict))
+
+    def __getitem__(self, vn_id: str) -> dict:
+        value = self._bodies[vn_id]
+        if isinstance(value, dict):
+            return value
+        self.load((vn_id,))
+        return self._bodies[vn_id]
+
+    def __setitem__(self, vn_id: str, vn: dict) -> None:
+        with self._lock:
+            self._bodies[vn_id] = vn
+
+    def __delitem__(self, vn_id: str) -> None:
+        with self._lock:
+            del self._bodies[vn_id]
+
+    def __contains__(self, vn_id) -> bool:
+        return vn_id in self._bodies
+
+    def __iter__(self):
+        return iter(list(self._bodies))
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def __repr__(self) -> str:
+        return f"LazyVns({len(self._bodies)} VNs, {self.loaded_count()} loaded)"
+
+
+def load_vns(data: dict, vn_ids=None) -> None:
+    """
+    Makes sure the bodies of vn_ids (all VNs if None) are in memory, in one
+    batch. A no-op for saves that are already fully loaded.
+    """
+    vns = data.get("vns")
+    if not isinstance(vns, LazyVns):
+        return
+    if vn_ids is None:
+        vns.load_all()
+    else:
+        vns.load(vn_ids)
+
+
+class LibraryIndex:
+    """
+    Maps each VN id to the categories holding it (and its entry there), so
+    membership checks, note lookups and "which categories contain this VN" are
+    dict lookups instead of scans over every category list.
+    Kept up to date by the mutation functions in this module for the data dict
+    it was attached to with attach_index(). It also records which VNs changed
+    since take_changed() was last called, for indexes derived from it.
+    """
+
+    def __init__(self, data: dict):
+        self.rebuild(data)
+
+    def rebuild(self, data: dict) -> None:
+        self._by_vn: dict[str, dict[str, dict]] = {}
+        self._changed: set[str] = set()
+        for category, entries in data.get("lists", {}).items():
+            for entry in entries:
+                self._by_vn.setdefault(entry["id"], {})[category] = entry
+
+    def categories(self, vn_id: str):
+        return self._by_vn.get(vn_id, {}).keys()
+
+    def entry(self, category: str, vn_id: str) -> dict | None:
+        return self._by_vn.get(vn_id, {}).get(category)
+
+    def contains(self, category: str, vn_id: str) -> bool:
+        return category in self._by_vn.get(vn_id, {})
+
+    def is_referenced(self, vn_id: str) -> bool:
+        return vn_id in self._by_vn
+
+    def touch(self, vn_id: str) -> None:
+        self._changed.add(vn_id)
+
+    def take_changed(self) -> set[str]:
+        """
+        Returns the ids of VNs added to, removed from or moved between categories,
+        or whose notes changed, since the last call. Renaming a category keeps
+        its entries and is not recorded.
+        """
+        changed = self._changed
+        self._changed = set()
+        return changed
+
+    def add(self, category: str, entry: dict) -> None:
+        self._by_vn.setdefault(entry["id"], {})[category] = entry
+        self._changed.add(entry["id"])
+
+    def remove(self, category: str, vn_id: str) -> None:
+        self._changed.add(vn_id)
+        memberships = self._by_vn.get(vn_id)
+        if memberships is None:
+            return
+        memberships.pop(category, None)
+        if not memberships:
+            del self._by_vn[vn_id]
+
+    def rename(self, old: str, new: str, entries: list[dict]) -> None:
+        for entry in entries:
+            memberships = self._by_vn.get(entry["id"])
+            if memberships is not None and old in memberships:
+                memberships[new] = memberships.pop(old)
+
+
+# The app works on a single save data dict; its index lives here so every
+# mutation path below keeps it current without threading it through the UI.
+_attached: list = [None, None]
+
+
+def attach_index(data: dict) -> LibraryIndex:
+    """
+    Builds the membership index for data and has this module maintain it.
+    Call again after replacing the contents of data wholesale.
+    """
+    index = LibraryIndex(data)
+    _attached[0] = data
+    _attached[1] = index
+    return index
+
+
+def _index(data: dict) -> LibraryIndex | None:
+    return _attached[1] if _attached[0] is data else None
+
+
+def attached_index(data: dict) -> LibraryIndex | None:
+    """
+    Returns the index this module maintains for data, or None if none was attached.
+    """
+    return _index(data)
+
+
+def frozen_copy(data: dict, library: dict | None = None) -> dict:
+    """
+    Returns a copy of data for a writer on another thread: the VN map, category
+    order, category lists and settings are copied, so adding, moving or removing
+    VNs afterwards doesn't change it. VN bodies and membership entries are
+    shared; bodies are only ever replaced, never changed in place.
+    library, the result of an earlier call for the same data, reuses its copy of
+    everything but the settings.
+    """
+    frozen = dict(data)
+    frozen["settings"] = dict(data.get("settings", {}))
+    if library is not None:
+        for key in ("vns", "lists", "categories"):
+            frozen[key] = library[key]
+        return frozen
+    vns = data.get("vns", {})
+    frozen["vns"] = vns.copy() if isinstance(vns, LazyVns) else dict(vns)
+    frozen["lists"] = {category: list(entries) for category, entries in data.get("lists", {}).items()}
+    frozen["categories"] = list(data.get("categories", []))
+    return frozen
+
+
+def is_normalized(data: dict) -> bool:
+    return "lists" in data
+
+
+def normalize(data: dict) -> bool:
+    """
+    Migrates the old layout, where data["vns"] mapped each category to a list of
+    full VN dicts, in place. Returns True if anything was converted.
+    When the same VN sat in several categories, the copy seen last wins for the
+    VNDB fields; notes and added_at are kept per category.
+    The old VN dicts are reused and each category is dropped from the old
+    layout once converted, so the library never exists twice in memory.
+    """
+    if is_normalized(data):
+        return False
+    old = data.get("vns", {})
+    vns = {}
+    lists = {}
+    for category in list(old):
+        members = lists.setdefault(category, [])
+        seen = set()
+        for vn in old.pop(category):
+            vn_id = vn.get("id")
+            if not vn_id or vn_id in seen:
+                continue
+            seen.add(vn_id)
+            added_at = vn.pop("added_at", None)
+            notes = vn.pop("notes", None)
+            vns[vn_id] = vn
+            members.append(_entry(vn_id, added_at, notes))
+    data["vns"] = vns
+    data["lists"] = lists
+    return True
+
+
+def _entry(vn_id: str, added_at, notes) -> dict:
+    entry = {"id": vn_id}
+    if added_at is not None:
+        entry["added_at"] = added_at
+    if notes:
+        entry["notes"] = notes
+    return entry
+
+
+def find_entry(data: dict, category: str, vn_id: str) -> dict | None:
+    index = _index(data)
+    if index is not None:
+        return index.entry(category, vn_id)
+    for entry in data.get("lists", {}).get(category, []):
+        if entry["id"] == vn_id:
+            return entry
+    return None
+
+
+def category_size(data: dict, category: str) -> int:
+    return len(data.get("lists", {}).get(category, []))
+
+
+def category_vns(data: dict, category: str) -> list[dict]:
+    """
+    Returns the VNs of a category in list order, each as a new dict combining the
+    VN's fields with its membership fields. Changes to these dicts are not saved;
+    use the functions below.
+    """
+    entries = data.get("lists", {}).get(category, [])
+    load_vns(data, [entry["id"] for entry in entries])
+    vns = data.get("vns", {})
+    result = []
+    for entry in entries:
+        vn = vns.get(entry["id"])
+        if vn is None:
+            continue
+        result.append(_member_view(vn, entry))
+    return result
+
+
+def category_vn(data: dict, category: str, vn_id: str) -> dict | None:
+    """
+    Returns the view category_vns() would give for one VN of a category, or None
+    if the VN is not in it.
+    """
+    entry = find_entry(data, category, vn_id)
+    vn = data.get("vns", {}).get(vn_id) if entry is not None else None
+    return _member_view(vn, entry) if vn is not None else None
+
+
+def _member_view(vn: dict, entry: dict) -> dict:
+    view = dict(vn)
+    view["added_at"] = entry.get("added_at")
+    view["notes"] = entry.get("notes", "")
+    return view
+
+
+def vn_categories(data: dict, vn_id: str) -> list[str]:
+    index = _index(data)
+    if index is not None:
+        found = index.categories(vn_id)
+        if not found:
+            return []
+        ordered = [category for category in data["categories"] if category in found]
+        return ordered + [category for category in found if category not in ordered]
+    return [
+        category for category, entries in data.get("lists", {}).items()
+        if any(entry["id"] == vn_id for entry in entries)
+    ]
+
+
+def is_in_category(data: dict, category: str, vn_id: str) -> bool:
+    index = _index(data)
+    if index is not None:
+        return index.contains(category, vn_id)
+    return any(entry["id"] == vn_id for entry in data.get("lists", {}).get(category, []))
+
+
+def _is_referenced(data: dict, vn_id: str) -> bool:
+    index = _index(data)
+    if index is not None:
+        return index.is_referenced(vn_id)
+    return any(e["id"] == vn_id for entries in data.get("lists", {}).values() for e in entries)
+
+
+def _drop_vn(data: dict, vn_id: str) -> None:
+    # Not pop(): that would load a lazy body just to throw it away
+    vns = data.get("vns", {})
+    if vn_id in vns:
+        del vns[vn_id]
+
+
+def add_vn(data: dict, category: str, vn: dict, added_at: float | None = None, notes: str = "") -> bool:
+    """
+    Adds a VN to the end of a category, storing or refreshing its VNDB fields.
+    Returns False if it was already in that category.
+    """
+    members = data.setdefault("lists", {}).setdefault(category, [])
+    if is_in_category(data, category, vn["id"]):
+        return False
+    data.setdefault("vns", {})[vn["id"]] = {k: v for k, v in vn.items() if k not in MEMBERSHIP_FIELDS}
+    entry = _entry(vn["id"], time.time() if added_at is None else added_at, notes)
+    members.append(entry)
+    index = _index(data)
+    if index is not None:
+        index.add(category, entry)
+    return True
+
+
+def remove_vn(data: dict, category: str, vn_id: str) -> dict | None:
+    """
+    Removes a VN from a category and returns its membership entry. The VN itself
+    is dropped once no category refers to it.
+    """
+    if not is_in_category(data, category, vn_id):
+        return None
+    members = data["lists"][category]
+    for i, entry in enumerate(members):
+        if entry["id"] == vn_id:
+            del members[i]
+            break
+    else:
+        return None
+    index = _index(data)
+    if index is not None:
+        index.remove(category, vn_id)
+    if not _is_referenced(data, vn_id):
+        _drop_vn(data, vn_id)
+    return entry
+
+
+def move_vn(data: dict, src: str, dest: str, vn_id: str) -> bool:
+    """
+    Moves a VN's membership entry, with its notes and added_at, from src to the
+    end of dest. If dest already holds the VN it is just removed from src.
+    """
+    if src == dest:
+        return is_in_category(data, src, vn_id)
+    if is_in_category(data, dest, vn_id):
+        return remove_vn(data, src, vn_id) is not None
+    entry = find_entry(data, src, vn_id)
+    if entry is None:
+        return False
+    lists = data["lists"]
+    lists[src].remove(entry)
+    lists.setdefault(dest, []).append(entry)
+    index = _index(data)
+    if index is not None:
+        index.remove(src, vn_id)
+        index.add(dest, entry)
+    return True
+
+
+def set_note(data: dict, category: str, vn_id: str, note: str) -> bool:
+    entry = find_entry(data, category, vn_id)
+    if entry is None:
+        return False
+    if note:
+        entry["notes"] = note
+    else:
+        entry.pop("notes", None)
+    index = _index(data)
+    if index is not None:
+        index.touch(vn_id)
+    return True
+
+
+def add_category(data: dict, name: str) -> bool:
+    if name in data["categories"]:
+        return False
+    data["categories"].append(name)
+    return True
+
+
+def rename_category(data: dict, old: str, new: str) -> bool:
+    if old not in data["categories"] or new in data["categories"]:
+        return False
+    data["categories"][data["categories"].index(old)] = new
+    lists = data.setdefault("lists", {})
+    if old in lists:
+        lists[new] = lists.pop(old)
+        index = _index(data)
+        if index is not None:
+            index.rename(old, new, lists[new])
+    return True
+
+
+def delete_category(data: dict, name: str) -> bool:
+    if name not in data["categories"]:
+        return False
+    data["categories"].remove(name)
+    entries = data.setdefault("lists", {}).pop(name, [])
+    index = _index(data)
+    for entry in entries:
+        if index is not None:
+            index.remove(name, entry["id"])
+        if not _is_referenced(data, entry["id"]):
+            _drop_vn(data, entry["id"])
+    return True
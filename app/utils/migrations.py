@@ -0,0 +1,88 @@
+from app.utils import library_data
+
+# Save data format versions. The version is stored in the save data itself
+# (data["save_version"]) so every storage backend keeps it.
+#   1: data["vns"] = {category: [full VN dict, ...]}; no version field
+#   2: VNs stored once by id, categories as entry lists (see library_data.py)
+#
+# To change the save data format, bump SAVE_FORMAT_VERSION and register the
+# step that upgrades a save from the previous version in MIGRATIONS:
+#   "data": function(data) run on the save dict. For sectioned saves the VN
+#           bodies are not loaded yet, so it must not depend on them.
+#   "vn":   function(vn) -> vn run on each VN body. Storage backends apply it
+#           one body at a time (while loading a body or rewriting the save),
+#           so a large library is never held twice in memory.
+# Either may be None. Steps run in version order.
+
+SAVE_FORMAT_VERSION = 2
+VERSION_KEY = "save_version"
+
+
+class SaveVersionError(ValueError):
+    """
+    The save was written by a newer VnManager with a format this one can't read.
+    """
+
+
+MIGRATIONS: dict[int, dict] = {
+    2: {"data": library_data.normalize, "vn": None},
+}
+
+
+def save_version(data: dict) -> int:
+    """
+    Returns the format version of loaded save data. Saves from before the
+    version field are told apart by their layout.
+    Raises SaveVersionError for versions newer than SAVE_FORMAT_VERSION.
+    """
+    version = data.get(VERSION_KEY)
+    if version is None:
+        version = 2 if library_data.is_normalized(data) else 1
+    if not isinstance(version, int) or version < 1:
+        raise ValueError(f"invalid save format version: {version!r}")
+    if version > SAVE_FORMAT_VERSION:
+        raise SaveVersionError(
+            f"save format version {version} is newer than this version of VnManager supports "
+            f"({SAVE_FORMAT_VERSION})"
+        )
+    return version
+
+
+def _steps(version: int, kind: str) -> list:
+    return [
+        MIGRATIONS[target][kind]
+        for target in range(version + 1, SAVE_FORMAT_VERSION + 1)
+        if MIGRATIONS[target][kind] is not None
+    ]
+
+
+def has_vn_steps(version: int) -> bool:
+    return bool(_steps(version, "vn"))
+
+
+def migrate_vn(vn: dict, version: int) -> dict:
+    """
+    Upgrades one VN body from the given save version to the current one.
+    """
+    for step in _steps(version, "vn"):
+        vn = step(vn)
+    return vn
+
+
+def migrate(data: dict, version: int) -> bool:
+    """
+    Upgrades save data from the given version in place and stamps the current
+    version on it. VN bodies are upgraded here only when data["vns"] is a plain
+    dict; a LazyVns is left to the storage backend, which upgrades bodies as it
+    reads them. Returns True if data was older than the current version.
+    """
+    for target in range(version + 1, SAVE_FORMAT_VERSION + 1):
+        step = MIGRATIONS[target]
+        if step["data"] is not None:
+            step["data"](data)
+        vns = data.get("vns", {})
+        if step["vn"] is not None and not isinstance(vns, library_data.LazyVns):
+            for vn_id in list(vns):
+                vns[vn_id] = step["vn"](vns[vn_id])
+    data[VERSION_KEY] = SAVE_FORMAT_VERSION
+    return version < SAVE_FORMAT_VERSION
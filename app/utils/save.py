@@ -1,21 +1,36 @@
-import json
 import os
 import sys
 import copy
+import shutil
+import sqlite3
 import threading
+import time
 
+import tkinter
 import customtkinter
 
+from app.utils import library_data
+from app.utils.backups import BackupWorker, load_latest_backup, BACKUP_COUNT, BACKUP_INTERVAL_SECONDS
+from app.utils.migrations import SAVE_FORMAT_VERSION, VERSION_KEY
+from app.utils.storage import JsonStorage, SqliteStorage, available_compressions
+
 _DEFAULT_DATA = {
     "categories": ["Not finished", "Finished", "Planned"],
     "vns": {},
+    "lists": {},
+    VERSION_KEY: SAVE_FORMAT_VERSION,
     "settings": {
         "allow_suggestive": False,
         "allow_explicit": False,
         "fast_results_scroll_units": 100,
         "low_perf_mode": False,
+        "image_backend": "auto",
         "cover_cache_max": 500,
+        "cover_cache_max_mb": 300,
+        "memory_cache_mb": 256,
         "cache_main_only": False,
+        "cover_download_connections": 4,
+        "save_compression": "auto",
         "theme_name": "pink",
         "font_scale": 1.0,
         "high_contrast_mode": False,
@@ -37,34 +52,115 @@ def get_save_dir() -> str:
 
 
 _SAVE_FILE = os.path.join(_get_save_dir(), "save.json")
+_SQLITE_FILE = os.path.join(_get_save_dir(), "library.sqlite3")
+_BACKUP_DIR = os.path.join(_get_save_dir(), "backups")
 _SAVE_LOCK = threading.Lock()
+_SAVE_ERRORS = (OSError, TypeError, ValueError, sqlite3.Error)
+
+STORAGE_BACKENDS = ("json", "sqlite")
+
+
+def _open_storage():
+    # The SQLite file only exists once the user has switched to it, so its presence picks the backend
+    if os.path.exists(_SQLITE_FILE):
+        return SqliteStorage(_SQLITE_FILE)
+    return JsonStorage(_SAVE_FILE)
+
+
+_storage = [_open_storage()]
 
 
 def default_data() -> dict:
     return copy.deepcopy(_DEFAULT_DATA)
 
 
+def _keep_unreadable(storage) -> bool:
+    # Whatever replaces the save gets written over these files on the first change.
+    # Returns False if a copy could not be made.
+    kept = True
+    for path in storage.files():
+        if not os.path.exists(path):
+            continue
+        try:
+            shutil.copy2(path, f"{path}.unreadable")
+        except OSError as e:
+            print(f"[VnManager] Failed to keep a copy of {path}: {e}", file=sys.stderr)
+            kept = False
+            continue
+        print(f"[VnManager] Kept a copy of the unreadable save as {path}.unreadable", file=sys.stderr)
+    return kept
+
+
+_restored_from = [None]
+# Set when the unreadable save couldn't be copied aside: nothing is written over it this session
+_writes_refused = [None]
+
+
+def _restore_from_backup(kept: bool) -> dict:
+    restored = load_latest_backup(_BACKUP_DIR)
+    if restored is None:
+        print("[VnManager] No usable backup found, using defaults", file=sys.stderr)
+        return default_data()
+    data, path = restored
+    print(f"[VnManager] Restored save data from backup {path}", file=sys.stderr)
+    _restored_from[0] = path
+    if not kept:
+        # Writing now would overwrite the only copy of the unreadable save
+        print("[VnManager] Not writing the restored data over the unreadable save", file=sys.stderr)
+        _writes_refused[0] = (
+            "The save file can't be read and no copy of it could be made, so it is left as it is "
+            "and changes won't be saved. Back up the save folder and restart VnManager."
+        )
+        return data
+    storage = _storage[0]
+    if isinstance(storage, SqliteStorage):
+        # The database file itself may be what is broken; rebuild it from the backup
+        storage.close()
+        _remove_sqlite_files()
+        storage = _storage[0] = SqliteStorage(_SQLITE_FILE)
+    try:
+        with _SAVE_LOCK:
+            storage.save(data)
+    except _SAVE_ERRORS as e:
+        print(f"[VnManager] Failed to write restored save data: {e}", file=sys.stderr)
+    return data
+
+
 def load_data() -> dict:
     """
-    Loads save data from the platform save path, returning defaults if the file is missing.
+    Loads save data from the platform save path, returning defaults if the file
+    is missing. Saves of an older format version are upgraded (see
+    app/utils/migrations.py). If the save can't be read, or comes from a newer
+    VnManager, the files are copied to *.unreadable and the newest intact backup
+    is restored; defaults are only used when there is none. If the copy can't be
+    made, the unreadable files are left alone and saves are refused this session.
     """
-    try:
-        with open(_SAVE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return default_data()
-    except (json.JSONDecodeError, OSError) as e:
-        print(f"[VnManager] Failed to load save data, using defaults: {e}", file=sys.stderr)
+    storage = _storage[0]
+    if not storage.exists():
         return default_data()
+    try:
+        with _SAVE_LOCK:
+            data = storage.load()
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"[VnManager] Failed to load save data: {e}", file=sys.stderr)
+        return _restore_from_backup(_keep_unreadable(storage))
+    if storage.upgraded:
+        # One-time write in the current format; if it fails, the next save retries it
+        try:
+            with _SAVE_LOCK:
+                storage.save(data)
+        except _SAVE_ERRORS as e:
+            print(f"[VnManager] Failed to write migrated save data: {e}", file=sys.stderr)
+    return data
 
 
-def _show_save_error(message: str) -> None:
+def _show_save_error(message: str, height: int = 110) -> None:
     """
     Displays a popup window with an error message when saving fails.
     """
     popup = customtkinter.CTkToplevel()
     popup.title("Save error")
-    popup.geometry("340x110")
+    popup.geometry(f"340x{height}")
     popup.after(50, lambda: popup.lift())
     customtkinter.CTkLabel(
         popup,
@@ -75,23 +171,348 @@ def _show_save_error(message: str) -> None:
     customtkinter.CTkButton(popup, text="OK", width=80, command=popup.destroy).pack()
 
 
-def save_data(data: dict) -> None:
+# Saves requested from the UI are coalesced and written on a background thread
+# once no new save has come in for SAVE_DELAY_SECONDS (or MAX_SAVE_DELAY_SECONDS
+# after the first pending one, so a long slider drag still gets written).
+SAVE_DELAY_SECONDS = 0.5
+MAX_SAVE_DELAY_SECONDS = 3.0
+
+
+class _SaveScheduler:
     """
-    Saves data to the save file. Creates the directory if it doesn't exist.
-    Shows an error popup if the write fails.
+    Background writer for save_data. Keeps a frozen copy of the latest data
+    dict (see library_data.frozen_copy(); the UI thread keeps changing the real
+    one) and the change tuples requested since the last write, in order; the
+    writer thread persists them in one storage call. The thread only starts
+    once start() is given a Tk root to report errors through; before that, saves
+    are written synchronously.
     """
-    try:
-        os.makedirs(os.path.dirname(_SAVE_FILE), exist_ok=True)
-        with _SAVE_LOCK:
-            tmp_path = f"{_SAVE_FILE}.tmp"
-            with open(tmp_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            os.replace(tmp_path, _SAVE_FILE)
-    except (OSError, TypeError, ValueError) as e:
-        _show_save_error(str(e))
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._root = None
+        self._thread = None
+        self._data = None
+        # (data, frozen copy) last taken for a library change; settings changes reuse it
+        self._library = None
+        self._changes: list[tuple] = []
+        self._full = False
+        self._dirty = False
+        self._writing = False
+        self._first_request = 0.0
+        self._last_request = 0.0
+        self.requested = 0
+        self.written = 0
+        self.write_seconds = 0.0
+
+    def start(self, root) -> None:
+        with self._cond:
+            self._root = root
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+                self._thread.start()
+
+    def request(self, data: dict, change: tuple | None) -> None:
+        with self._cond:
+            self.requested += 1
+            now = time.monotonic()
+            if not self._dirty:
+                self._first_request = now
+            self._last_request = now
+            self._dirty = True
+            self._data = self._freeze(data, change)
+            self._queue_change(change)
+            if self._thread is not None:
+                self._cond.notify_all()
+                return
+        self.flush()
+
+    def _freeze(self, data: dict, change: tuple | None) -> dict:
+        # Runs on the UI thread, so the copy matches data as of this request
+        if change is not None and change[0] == "setting" and self._library is not None and self._library[0] is data:
+            return library_data.frozen_copy(data, self._library[1])
+        frozen = library_data.frozen_copy(data)
+        self._library = (data, frozen)
+        return frozen
+
+    def forget_copies(self) -> None:
+        # After a backend switch: unloaded bodies in the cached copy are
+        # placeholders only the old backend can read
+        with self._cond:
+            self._library = None
+
+    def _queue_change(self, change: tuple | None) -> None:
+        # Changes replay in order; only a repeat of the last one (a slider drag,
+        # a note edited twice) is merged, since each reads its values from data
+        if change is None:
+            self._full = True
+        elif not self._full and (not self._changes or self._changes[-1] != change):
+            self._changes.append(change)
+
+    def _take(self):
+        data = self._data
+        changes = None if self._full else self._changes
+        self._changes = []
+        self._full = False
+        self._dirty = False
+        self._writing = True
+        return data, changes
+
+    def _write(self, data: dict, changes: list[tuple] | None) -> None:
+        if _writes_refused[0] is not None:
+            # start_background_saves() already told the user
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+            return
+        started = time.perf_counter()
+        error = None
+        try:
+            with _SAVE_LOCK:
+                _storage[0].save(data, changes)
+        except RuntimeError:
+            # The UI thread changed a membership entry the frozen copy shares
+            # mid-write. The write was abandoned (tmp file or rolled back
+            # transaction); rewrite everything on the next pass.
+            with self._cond:
+                self._full = True
+                if not self._dirty:
+                    self._dirty = True
+                    self._first_request = self._last_request = time.monotonic()
+        except _SAVE_ERRORS as e:
+            error = str(e)
+        with self._cond:
+            self._writing = False
+            if error is None:
+                self.written += 1
+                self.write_seconds += time.perf_counter() - started
+                _backups.saved()
+            else:
+                # Leave the failed changes for the next save to retry as a full rewrite
+                self._full = True
+            self._cond.notify_all()
+        if error is not None:
+            self._report(error)
+
+    def _report(self, message: str) -> None:
+        if self._root is None:
+            _show_save_error(message)
+            return
+        print(f"[VnManager] Failed to save data: {message}", file=sys.stderr)
+        try:
+            if threading.current_thread() is self._thread:
+                self._root.after(0, lambda: _show_save_error(message))
+            elif self._root.winfo_exists():
+                _show_save_error(message)
+        except (RuntimeError, tkinter.TclError):
+            # The window is already gone (final flush on exit); stderr has it
+            pass
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._dirty or self._writing:
+                    self._cond.wait()
+                while self._dirty and not self._writing:
+                    now = time.monotonic()
+                    due = min(self._last_request + SAVE_DELAY_SECONDS, self._first_request + MAX_SAVE_DELAY_SECONDS)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+                if not self._dirty or self._writing:
+                    continue
+                data, changes = self._take()
+            self._write(data, changes)
+
+    def flush(self) -> None:
+        """
+        Writes any pending save on the calling thread, after waiting for a write
+        already in progress.
+        """
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            if not self._dirty:
+                return
+            data, changes = self._take()
+        self._write(data, changes)
+
+    def stats(self) -> dict:
+        with self._cond:
+            average = self.write_seconds / self.written if self.written else 0.0
+            return {
+                "requested": self.requested,
+                "written": self.written,
+                "avoided": max(0, self.requested - self.written),
+                # Every requested save used to be a write on the UI thread
+                "main_thread_ms_saved": self.requested * average * 1000,
+            }
+
+
+_saver = _SaveScheduler()
+
+
+def _copy_save_files(tmp_dir: str):
+    # Runs on the backup thread. Holding the save lock keeps a write from landing
+    # mid-copy; it is only held for the file copy itself.
+    with _SAVE_LOCK:
+        storage = _storage[0]
+        if not storage.exists():
+            return None
+        for path in storage.files():
+            if os.path.exists(path):
+                shutil.copyfile(path, os.path.join(tmp_dir, os.path.basename(path)))
+        return type(storage)(os.path.join(tmp_dir, os.path.basename(storage.path)))
+
+
+_backups = BackupWorker(_BACKUP_DIR, _copy_save_files)
+
+
+def save_data(data: dict, change: tuple | None = None) -> None:
+    """
+    Requests a save of data with the active storage backend. Once
+    start_background_saves() has run, the write happens on a background thread
+    after a short quiet period, merged with any other saves requested meanwhile;
+    otherwise it is written right away. Shows an error popup if the write fails.
+    Args:
+        data:   The full save data dict, already updated by the caller.
+        change: Optional tuple naming what changed, e.g. ("setting", "low_perf_mode")
+                or ("note", category, vn_id); see app/utils/storage.py. Lets the
+                SQLite backend update single rows. None saves everything.
+    """
+    _saver.request(data, change)
+
+
+def start_background_saves(root) -> None:
+    """
+    Moves save writes off the UI thread. root is the Tk root used to show save
+    errors on the main thread. Call flush_saves() before the app exits.
+    Also starts the thread that takes rotating backups after successful saves.
+    """
+    _saver.start(root)
+    _backups.start()
+    if _writes_refused[0] is not None:
+        message = _writes_refused[0]
+        root.after(0, lambda: _show_save_error(message, height=170))
+
+
+def flush_saves() -> None:
+    """
+    Writes any pending save immediately. Blocks until it is on disk.
+    """
+    _saver.flush()
+
+
+def get_save_stats() -> dict:
+    """
+    Returns counters for this session: saves requested, writes performed, saves
+    avoided by coalescing, and an estimate of the UI thread time no longer spent
+    writing (in ms).
+    """
+    return _saver.stats()
+
+
+def _remove_sqlite_files() -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(_SQLITE_FILE + suffix):
+            os.remove(_SQLITE_FILE + suffix)
+
+
+SAVE_COMPRESSIONS = available_compressions()
+_save_compression = ["auto"]
+
+
+def set_save_compression(compression: str) -> None:
+    """
+    Sets the compression of the JSON save snapshot: "auto" (zstd when the
+    zstandard package is installed, otherwise none), "none", "gzip" or "zstd".
+    Applies from the next save; the SQLite backend ignores it.
+    """
+    with _SAVE_LOCK:
+        _save_compression[0] = compression
+        if isinstance(_storage[0], JsonStorage):
+            _storage[0].configure(compression)
+
+
+def get_storage_backend() -> str:
+    return _storage[0].name
+
+
+def set_storage_backend(data: dict, backend: str) -> None:
+    """
+    Switches the save backend, migrating the current data once. Moving to SQLite
+    leaves save.json in place as a backup; moving back to JSON rewrites save.json
+    and removes the SQLite database.
+    Raises OSError or sqlite3.Error if the new backend can't be written, in which
+    case the old backend stays active.
+    """
+    if backend not in STORAGE_BACKENDS or backend == _storage[0].name:
+        return
+    if _writes_refused[0] is not None:
+        # Switching would write a new save or remove the unreadable database
+        raise OSError(_writes_refused[0])
+    flush_saves()
+    # Unloaded VN bodies are placeholders only the old backend can read
+    library_data.load_vns(data)
+    with _SAVE_LOCK:
+        old = _storage[0]
+        if backend == "sqlite":
+            new = SqliteStorage(_SQLITE_FILE)
+            try:
+                new.save(data)
+            except (OSError, sqlite3.Error):
+                new.close()
+                _remove_sqlite_files()
+                raise
+        else:
+            new = JsonStorage(_SAVE_FILE)
+            new.configure(_save_compression[0])
+            new.save(data)
+        _storage[0] = new
+        old.close()
+        if backend == "json":
+            _remove_sqlite_files()
+    _saver.forget_copies()
+
+
+def create_backup() -> str | None:
+    """
+    Writes any pending save, then takes a backup right away on the calling
+    thread. Returns the backup's path, or None if it failed or nothing is saved yet.
+    """
+    flush_saves()
+    return _backups.backup_now()
+
+
+def get_backup_stats() -> dict:
+    """
+    Returns the number of backups on disk, the newest one's time (or None),
+    backups taken this session, how long the last one took in seconds, the
+    last backup error (or None), and the backup restored at startup (or None).
+    """
+    stats = _backups.stats()
+    stats["restored_from"] = _restored_from[0]
+    return stats
+
+
+def get_backup_dir() -> str:
+    return _BACKUP_DIR
+
+
+def wait_for_backups() -> None:
+    """
+    Blocks until a backup queued with reset_data() has been written. Call it
+    off the UI thread before exiting the process.
+    """
+    _backups.wait()
 
 
 def reset_data() -> dict:
+    # Keep the library being thrown away among the backups. Only the file copy
+    # happens here; the backup thread exports it (see wait_for_backups()).
+    flush_saves()
+    _backups.backup_soon()
     data = default_data()
     save_data(data)
+    flush_saves()
     return data
@@ -0,0 +1,386 @@
+import bisect
+import sys
+import threading
+import unicodedata
+
+from app.utils import library_data
+
+# Search index for the library filter bar. Titles, alternative titles and notes
+# are indexed by trigram (every 3 character slice of their normalized text), tag
+# names by word, so a query token only has to look at the VNs sharing all of its
+# trigrams or holding a tag word it starts. Candidates are then checked against
+# the stored normalized text, which keeps results exact:
+#   - every whitespace separated token of the query has to match (AND)
+#   - a token matches a VN if it is a substring of its title, alttitle or notes,
+#     or a prefix of a word of one of its (non-spoiler) tags
+# Tokens shorter than 3 characters have no trigrams; a query made only of those
+# checks the precomputed text of every VN in scope instead.
+# The first query starts building the index on a background thread, from a
+# frozen copy of the data whose VN bodies are loaded a batch at a time and
+# dropped once indexed, so the app's own data stays lazily loaded. Until it is
+# ready, search() and matches() scan the category with the same rules. Once
+# ready, the index follows the changes the LibraryIndex of the same data
+# records, re-indexing only those VNs.
+
+_EMPTY: frozenset = frozenset()
+_BUILD_BATCH = 500
+
+# Normalized words of each tag name, each preceded by a newline; VNDB has a
+# few thousand tags, shared by the whole library
+_tag_name_text: dict[str, str] = {}
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _needles(query: str) -> list[tuple[str, str]]:
+    # (token, token as the start of a tag word) pairs, longest token first
+    tokens = sorted(set(normalize(query).split()), key=len, reverse=True)
+    return [(token, f"\n{token}") for token in tokens]
+
+
+def _names_text(vn: dict) -> str:
+    return f"{normalize(vn.get('title') or '')}\n{normalize(vn.get('alttitle') or '')}"
+
+
+def _tag_text(vn: dict) -> str:
+    # Words of the tags get_clean_tags() would show (no spoilers or lies), each
+    # preceded by a newline; a word can repeat
+    parts = []
+    for tag in vn.get("tags") or ():
+        if tag.get("lie") or tag.get("spoiler", 0) != 0:
+            continue
+        text = _tag_name_text.get(tag["name"])
+        if text is None:
+            text = _tag_name_text[tag["name"]] = "".join(f"\n{word}" for word in normalize(tag["name"]).split())
+        parts.append(text)
+    return "".join(parts)
+
+
+# Tag text of the VNs scanned while the index is being built, by VN id with the
+# body it was made from, so the following keystrokes don't redo it
+_scan_tags: dict[str, tuple[dict, str]] = {}
+
+
+def _vn_matches(vn: dict, notes: list[str], needles: list[tuple[str, str]]) -> bool:
+    # Unindexed check of one VN, with the normalized notes of the memberships in scope
+    names = _names_text(vn)
+    tags = None
+    for token, word_start in needles:
+        if token in names or any(token in note for note in notes):
+            continue
+        if tags is None:
+            cached = _scan_tags.get(vn["id"])
+            if cached is not None and cached[0] is vn:
+                tags = cached[1]
+            else:
+                tags = _tag_text(vn)
+                _scan_tags[vn["id"]] = (vn, tags)
+        if word_start not in tags:
+            return False
+    return True
+
+
+class SearchIndex:
+    """
+    Answers filter queries over the VNs of one data dict, keeping up with the
+    changes recorded by library, the LibraryIndex attached to it.
+    Use search() and matches() below rather than building one directly.
+    """
+
+    def __init__(self, data: dict, library: library_data.LibraryIndex):
+        self.data = data
+        self.library = library
+        # Normalized "title\nalttitle" by VN id
+        self._names: dict[str, str] = {}
+        # (membership entry, normalized notes) pairs by VN id; keyed by entry so
+        # renaming or moving a category leaves them valid
+        self._notes: dict[str, list[tuple[dict, str]]] = {}
+        # Normalized tag words by VN id, each preceded by a newline
+        self._tags: dict[str, str] = {}
+        # Trigram -> VN ids; a single id is stored bare, most trigrams have one
+        self._grams: dict[str, set[str] | str] = {}
+        self._tag_docs: dict[str, set[str]] = {}
+        # Sorted tag words, for prefix lookups
+        self._tag_words: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def index_all(self, frozen: dict) -> None:
+        """
+        Indexes every VN of frozen, a library_data.frozen_copy() of data taken
+        when library's changes were last taken. Touches nothing but frozen and
+        this index, so it can run on another thread.
+        """
+        members = library_data.LibraryIndex(frozen)
+        vns = frozen.get("vns", {})
+        vn_ids = list(dict.fromkeys(
+            entry["id"] for entries in frozen.get("lists", {}).values() for entry in entries
+        ))
+        for start in range(0, len(vn_ids), _BUILD_BATCH):
+            batch = vn_ids[start:start + _BUILD_BATCH]
+            library_data.load_vns(frozen, batch)
+            for vn_id in batch:
+                vn = vns.get(vn_id)
+                if vn is not None:
+                    self._add(vn_id, vn, members)
+                    # Only the copy's reference; the indexed text is all that's kept
+                    del vns[vn_id]
+
+    def refresh(self) -> None:
+        """
+        Re-indexes the VNs that changed since the last refresh.
+        """
+        changed = self.library.take_changed()
+        if not changed:
+            return
+        present = [vn_id for vn_id in changed if self.library.is_referenced(vn_id)]
+        library_data.load_vns(self.data, present)
+        vns = self.data.get("vns", {})
+        for vn_id in changed:
+            self._remove(vn_id)
+        for vn_id in present:
+            vn = vns.get(vn_id)
+            if vn is not None:
+                self._add(vn_id, vn, self.library)
+
+    def _doc_grams(self, vn_id: str) -> set[str]:
+        grams = _trigrams(self._names[vn_id])
+        for _entry, note in self._notes.get(vn_id, ()):
+            grams |= _trigrams(note)
+        return grams
+
+    def _add(self, vn_id: str, vn: dict, members: library_data.LibraryIndex) -> None:
+        self._names[vn_id] = _names_text(vn)
+        notes = []
+        for category in members.categories(vn_id):
+            entry = members.entry(category, vn_id)
+            if entry is not None and entry.get("notes"):
+                notes.append((entry, normalize(entry["notes"])))
+        if notes:
+            self._notes[vn_id] = notes
+        grams = self._grams
+        for gram in self._doc_grams(vn_id):
+            docs = grams.get(gram)
+            if docs is None:
+                grams[gram] = vn_id
+            elif isinstance(docs, str):
+                grams[gram] = {docs, vn_id}
+            else:
+                docs.add(vn_id)
+        tags = _tag_text(vn)
+        if not tags:
+            return
+        self._tags[vn_id] = tags
+        for word in dict.fromkeys(tags.split()):
+            docs = self._tag_docs.get(word)
+            if docs is None:
+                docs = self._tag_docs[word] = set()
+                bisect.insort(self._tag_words, word)
+            docs.add(vn_id)
+
+    def _remove(self, vn_id: str) -> None:
+        if vn_id not in self._names:
+            return
+        grams = self._grams
+        for gram in self._doc_grams(vn_id):
+            docs = grams[gram]
+            if isinstance(docs, str):
+                del grams[gram]
+                continue
+            docs.discard(vn_id)
+            if len(docs) == 1:
+                grams[gram] = next(iter(docs))
+        for word in dict.fromkeys(self._tags.pop(vn_id, "").split()):
+            docs = self._tag_docs[word]
+            docs.discard(vn_id)
+            if not docs:
+                del self._tag_docs[word]
+                del self._tag_words[bisect.bisect_left(self._tag_words, word)]
+        del self._names[vn_id]
+        self._notes.pop(vn_id, None)
+
+    def _postings(self, gram: str):
+        docs = self._grams.get(gram, _EMPTY)
+        return (docs,) if isinstance(docs, str) else docs
+
+    def _lookup(self, token: str) -> set[str]:
+        # Superset of the VNs token (3+ characters) matches
+        postings = sorted((self._postings(gram) for gram in _trigrams(token)), key=len)
+        found = set(postings[0]).intersection(*postings[1:])
+        words = self._tag_words
+        i = bisect.bisect_left(words, token)
+        while i < len(words) and words[i].startswith(token):
+            found |= self._tag_docs[words[i]]
+            i += 1
+        return found
+
+    def _doc_matches(self, vn_id: str, needles: list[tuple[str, str]], entry: dict | None) -> bool:
+        # entry: the VN's membership entry in the searched category, or None
+        # when searching all of them
+        names = self._names.get(vn_id)
+        if names is None:
+            return False
+        tags = self._tags.get(vn_id, "")
+        notes = self._notes.get(vn_id, ())
+        for token, word_start in needles:
+            if token in names or word_start in tags:
+                continue
+            if not any((entry is None or owner is entry) and token in note for owner, note in notes):
+                return False
+        return True
+
+    def search(self, query: str, category: str | None = None) -> set[str]:
+        self.refresh()
+        needles = _needles(query)
+        candidates = None
+        for token, _word_start in needles:
+            if len(token) < 3:
+                break
+            found = self._lookup(token)
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return set()
+        if category is None:
+            return {
+                vn_id for vn_id in (self._names if candidates is None else candidates)
+                if self._doc_matches(vn_id, needles, None)
+            }
+        if candidates is None:
+            members = [(entry["id"], entry) for entry in self.data.get("lists", {}).get(category, [])]
+        else:
+            members = [(vn_id, self.library.entry(category, vn_id)) for vn_id in candidates]
+        return {
+            vn_id for vn_id, entry in members
+            if entry is not None and self._doc_matches(vn_id, needles, entry)
+        }
+
+    def matches(self, vn_id: str, query: str, category: str | None = None) -> bool:
+        self.refresh()
+        entry = None
+        if category is not None:
+            entry = self.library.entry(category, vn_id)
+            if entry is None:
+                return False
+        return self._doc_matches(vn_id, _needles(query), entry)
+
+
+# Like the LibraryIndex, the index of the app's data dict lives here so the
+# filter bar and the add paths share it. "ready" is only handed to the UI
+# thread once its build has finished.
+_lock = threading.Lock()
+_indexes: dict = {"ready": None, "building": None}
+
+
+def _build(index: SearchIndex, frozen: dict) -> None:
+    built = False
+    try:
+        index.index_all(frozen)
+        built = True
+    except Exception as e:
+        # The filter scans meanwhile; the next query starts a new build
+        print(f"[VnManager] Failed to build the search index: {e!r}", file=sys.stderr)
+    finally:
+        with _lock:
+            if _indexes["building"] is index:
+                _indexes["building"] = None
+                if built:
+                    _indexes["ready"] = index
+                    _scan_tags.clear()
+
+
+def _is_for(index: SearchIndex | None, data: dict, library) -> bool:
+    return index is not None and index.data is data and index.library is library
+
+
+def _ready_index(data: dict) -> SearchIndex | None:
+    # The finished index for data, if there is one for its current LibraryIndex
+    library = library_data.attached_index(data)
+    with _lock:
+        index = _indexes["ready"]
+        return index if library is not None and _is_for(index, data, library) else None
+
+
+def _start_build(data: dict) -> None:
+    """
+    Starts building the index for data on a background thread, unless that is
+    already under way. Does nothing if data has no attached LibraryIndex to keep
+    the index current.
+    """
+    library = library_data.attached_index(data)
+    if library is None:
+        return
+    with _lock:
+        if _is_for(_indexes["ready"], data, library) or _is_for(_indexes["building"], data, library):
+            return
+        index = SearchIndex(data, library)
+        _indexes["ready"] = None
+        _indexes["building"] = index
+    # Both on this thread, so changes after the copy are exactly those recorded next
+    library.take_changed()
+    frozen = library_data.frozen_copy(data)
+    threading.Thread(target=_build, args=(index, frozen), name="search-index", daemon=True).start()
+
+
+def _scan(data: dict, needles: list[tuple[str, str]], category: str | None) -> set[str]:
+    lists = data.get("lists", {})
+    found = set()
+    for name in ([category] if category is not None else list(lists)):
+        entries = lists.get(name, [])
+        library_data.load_vns(data, [entry["id"] for entry in entries])
+        vns = data.get("vns", {})
+        for entry in entries:
+            vn = vns.get(entry["id"])
+            if vn is None or entry["id"] in found:
+                continue
+            if category is None:
+                notes = [
+                    normalize(member.get("notes") or "")
+                    for member in (
+                        library_data.find_entry(data, other, entry["id"])
+                        for other in library_data.vn_categories(data, entry["id"])
+                    )
+                    if member is not None
+                ]
+            else:
+                notes = [normalize(entry.get("notes") or "")]
+            if _vn_matches(vn, notes, needles):
+                found.add(entry["id"])
+    return found
+
+
+def search(data: dict, query: str, category: str | None = None) -> set[str]:
+    """
+    Returns the ids of the VNs in category (in any category if None) that match
+    every token of query. An empty query matches all of them. Uses the index
+    once it is built and scans the VNs in scope until then.
+    """
+    index = _ready_index(data)
+    if index is not None:
+        return index.search(query, category)
+    found = _scan(data, _needles(query), category)
+    # Afterwards, so the build doesn't compete with this scan for the GIL
+    _start_build(data)
+    return found
+
+
+def matches(data: dict, vn_id: str, query: str, category: str | None = None) -> bool:
+    """
+    Whether one VN (in category, if given) matches query, as search() decides.
+    """
+    index = _ready_index(data)
+    if index is not None:
+        return index.matches(vn_id, query, category)
+    _start_build(data)
+    categories = [category] if category is not None else library_data.vn_categories(data, vn_id)
+    entries = [library_data.find_entry(data, name, vn_id) for name in categories]
+    vn = data.get("vns", {}).get(vn_id)
+    if vn is None or any(entry is None for entry in entries) or not entries:
+        return False
+    return _vn_matches(vn, [normalize(entry.get("notes") or "") for entry in entries], _needles(query))
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+# Startup phase timings, printed to stderr once the first frame is drawn when
+# VNMANAGER_STARTUP_TIMING is set. Phases are measured from process start
+# (the first import of this module) to keep the numbers comparable between runs.
+
+_ENABLED = bool(os.getenv("VNMANAGER_STARTUP_TIMING"))
+_started = time.perf_counter()
+_last = [_started]
+_phases: list[tuple[str, float]] = []
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def mark(phase: str) -> None:
+    """
+    Ends the current startup phase and records how long it took under `phase`.
+    """
+    if not _ENABLED:
+        return
+    now = time.perf_counter()
+    _phases.append((phase, now - _last[0]))
+    _last[0] = now
+
+
+def report() -> None:
+    """
+    Prints the recorded phases and the total time since process start.
+    """
+    if not _ENABLED or not _phases:
+        return
+    total = time.perf_counter() - _started
+    width = max(len(phase) for phase, _ in _phases)
+    lines = [f"  {phase.ljust(width)}  {seconds * 1000:8.1f} ms" for phase, seconds in _phases]
+    print("[VnManager] Startup timing:", file=sys.stderr)
+    print("\n".join(lines), file=sys.stderr)
+    print(f"  {'total'.ljust(width)}  {total * 1000:8.1f} ms", file=sys.stderr)
+    _phases.clear()
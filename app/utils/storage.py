@@ -0,0 +1,767 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import zlib
+
+from app.utils import library_data, migrations
+
+# Optional speedups: a faster JSON codec and zstd compression for the snapshot.
+# Both fall back to the standard library when the package is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Storage backends for the save data dict (see app/utils/library_data.py):
+#   {"categories": [...], "vns": {vn_id: vn}, "lists": {category: [entry, ...]},
+#    "settings": {...}, ...}
+#
+# save() takes an optional list of change tuples describing what the caller
+# mutated in the dict since the last save, so a backend can persist only that part:
+#   ("setting", key)
+#   ("add_category", name)
+#   ("rename_category", old_name, new_name)
+#   ("delete_category", name)
+#   ("add_vn", category, vn_id)
+#   ("remove_vn", category, vn_id)
+#   ("move_vn", from_category, to_category, vn_id)
+#   ("note", category, vn_id)
+# Changes only name what changed; the values are read from the dict at save time.
+# changes=None means "anything may have changed" and rewrites everything.
+#
+# load() returns data["vns"] as a library_data.LazyVns, so startup only reads the
+# categories, lists and settings; VN bodies are decoded when a category needs them.
+
+_SCHEMA_VERSION = 2
+
+# The JSON journal is folded into a fresh snapshot once it reaches either limit
+JOURNAL_COMPACT_RECORDS = 500
+JOURNAL_COMPACT_BYTES = 2 * 1024 * 1024
+
+# VN bodies read per SQLite query when a LazyVns loads a batch (under SQLite's variable limit)
+_FETCH_BATCH = 500
+_GENERATION_KEY = "journal_generation"
+
+# A JSON snapshot is a header line (everything but the VN bodies, plus the VN ids
+# under this key) followed by one line per VN body in the same order, so loading
+# only parses the header. Files without the key hold the whole dict as one document.
+_VN_IDS_KEY = "vn_ids"
+# Lines joined, compressed and hashed per call when writing a snapshot; keeps
+# each step short so a background write never holds the GIL for long
+_WRITE_BATCH = 1000
+
+# "auto" compresses the snapshot with zstd when zstandard is installed. Without it,
+# gzip costs more save time than it is worth on a file that is rarely moved around.
+SNAPSHOT_COMPRESSIONS = ("auto", "none", "gzip", "zstd")
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def available_compressions() -> tuple[str, ...]:
+    return tuple(c for c in SNAPSHOT_COMPRESSIONS if c != "zstd" or zstandard is not None)
+
+
+def _resolve_compression(compression: str) -> str:
+    if compression == "auto":
+        return "zstd" if zstandard is not None else "none"
+    if compression == "zstd" and zstandard is None:
+        return "gzip"
+    return compression if compression in SNAPSHOT_COMPRESSIONS else "none"
+
+
+def encode_json(obj) -> bytes:
+    """
+    Serializes obj to compact UTF-8 JSON, using orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(raw: bytes):
+    """
+    Parses JSON bytes, transparently decompressing gzip or zstd snapshots
+    (detected by their magic bytes, so the file name never changes).
+    Raises ValueError for anything that can't be read.
+    """
+    return _loads(_decompress(raw))
+
+
+def _detect_compression(raw: bytes) -> str:
+    if raw[:2] == _GZIP_MAGIC:
+        return "gzip"
+    if raw[:4] == _ZSTD_MAGIC:
+        return "zstd"
+    return "none"
+
+
+def _decompress(raw: bytes) -> bytes:
+    if raw[:2] == _GZIP_MAGIC:
+        try:
+            raw = gzip.decompress(raw)
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"corrupt gzip save file: {e}") from e
+    elif raw[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("save file is zstd-compressed but the zstandard package is not installed")
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        try:
+            raw = decompressor.decompress(raw)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"corrupt zstd save file: {e}") from e
+        if not decompressor.eof:
+            raise ValueError("truncated zstd save file")
+    return raw
+
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(bytes(raw) if isinstance(raw, memoryview) else raw)
+
+
+def _compressobj(compression: str):
+    if compression == "gzip":
+        # Level 1: nearly the ratio of the default level for a fraction of the time
+        return zlib.compressobj(1, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    return None
+
+
+def _decompressobj(head: bytes):
+    if head[:2] == _GZIP_MAGIC:
+        return zlib.decompressobj(31)
+    if head[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("save file is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+
+def write_lines(f, lines: list, compression: str) -> bytes:
+    """
+    Writes lines (bytes-like, newline-terminated on disk) to the open binary
+    file f, compressed with "gzip", "zstd" or "none", a batch at a time.
+    Returns the SHA-256 digest of the uncompressed content.
+    """
+    digest = hashlib.sha256()
+    compressor = _compressobj(compression)
+    for start in range(0, len(lines), _WRITE_BATCH):
+        chunk = b"\n".join(lines[start:start + _WRITE_BATCH]) + b"\n"
+        digest.update(chunk)
+        f.write(compressor.compress(chunk) if compressor is not None else chunk)
+    if compressor is not None:
+        f.write(compressor.flush())
+    return digest.digest()
+
+
+def content_digest(path: str, chunk_size: int = 1024 * 1024) -> bytes:
+    """
+    Returns the SHA-256 digest of a file's uncompressed content, decompressing
+    it in chunks. Raises ValueError if the file is corrupt or truncated.
+    """
+    errors = (zlib.error, zstandard.ZstdError) if zstandard is not None else (zlib.error,)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        chunk = f.read(chunk_size)
+        decompressor = _decompressobj(chunk)
+        while chunk:
+            if decompressor is not None:
+                try:
+                    digest.update(decompressor.decompress(chunk))
+                except errors as e:
+                    raise ValueError(f"corrupt compressed file: {e}") from e
+            else:
+                digest.update(chunk)
+            chunk = f.read(chunk_size)
+    if decompressor is not None and not decompressor.eof:
+        raise ValueError("truncated compressed file")
+    return digest.digest()
+
+
+def _section_lines(header: dict, vn_ids: list[str], lines: list) -> list:
+    # Sectioned snapshot layout: header line, then one body line per id in vn_ids
+    return [encode_json({**header, _VN_IDS_KEY: vn_ids}), *lines]
+
+
+def _split_lines(raw: bytes, start: int) -> list[memoryview]:
+    # Views into raw instead of one big split(): no copy of the bodies, and the
+    # work is spread over many short calls instead of one long GIL hold
+    view = memoryview(raw)
+    lines = []
+    end = len(raw)
+    while start < end:
+        stop = raw.find(b"\n", start)
+        if stop < 0:
+            stop = end
+        lines.append(view[start:stop])
+        start = stop + 1
+    return lines
+
+
+def _body_decoder(version: int):
+    # LazyVns fetch for JSON snapshots: the placeholders are the raw body lines,
+    # written by a save of the given format version
+    def decode(pending: dict) -> dict:
+        bodies = {}
+        for vn_id, raw in pending.items():
+            try:
+                bodies[vn_id] = migrations.migrate_vn(_loads(raw), version)
+            except ValueError:
+                continue
+        return bodies
+    return decode
+
+
+def _apply_record(data: dict, record: dict) -> None:
+    """
+    Replays one journal record onto data, mirroring what the UI did. Records
+    that no longer match the data (e.g. a category that was removed) are skipped.
+    """
+    op = record.get("op")
+    if op == "setting":
+        data.setdefault("settings", {})[record["key"]] = record["value"]
+    elif op == "add_category":
+        library_data.add_category(data, record["name"])
+    elif op == "rename_category":
+        library_data.rename_category(data, record["old"], record["new"])
+    elif op == "delete_category":
+        library_data.delete_category(data, record["name"])
+    elif op == "add_vn":
+        # Journals written before normalization carry added_at/notes on the VN itself
+        vn = record["vn"]
+        entry = record.get("entry", vn)
+        library_data.add_vn(data, record["category"], vn, entry.get("added_at"), entry.get("notes", ""))
+    elif op == "move_vn":
+        vn_id = record["id"] if "id" in record else record["vn"]["id"]
+        library_data.move_vn(data, record["from"], record["category"], vn_id)
+    elif op == "remove_vn":
+        library_data.remove_vn(data, record["category"], record["id"])
+    elif op == "note":
+        library_data.set_note(data, record["category"], record["id"], record["notes"])
+
+
+def _change_record(data: dict, change: tuple) -> dict | None:
+    """
+    Turns a change tuple into a self-contained journal record, reading the new
+    values from data. Returns None if the change can't be expressed as one.
+    """
+    op, *args = change
+    if op == "setting":
+        if args[0] not in data.get("settings", {}):
+            return None
+        return {"op": op, "key": args[0], "value": data["settings"][args[0]]}
+    if op in ("add_category", "delete_category"):
+        return {"op": op, "name": args[0]}
+    if op == "rename_category":
+        return {"op": op, "old": args[0], "new": args[1]}
+    if op == "add_vn":
+        entry = library_data.find_entry(data, args[0], args[1])
+        vn = data.get("vns", {}).get(args[1])
+        if entry is None or vn is None:
+            return None
+        return {"op": op, "category": args[0], "vn": vn, "entry": entry}
+    if op == "move_vn":
+        return {"op": op, "from": args[0], "category": args[1], "id": args[2]}
+    if op == "remove_vn":
+        return {"op": op, "category": args[0], "id": args[1]}
+    if op == "note":
+        entry = library_data.find_entry(data, args[0], args[1])
+        if entry is None:
+            return None
+        return {"op": op, "category": args[0], "id": args[1], "notes": entry.get("notes", "")}
+    return None
+
+
+class JsonStorage:
+    """
+    Stores the save data dict as a JSON snapshot plus an append-only journal of
+    change records next to it (save.journal, one JSON object per line).
+    Saves with change tuples only append to the journal; load replays it over
+    the snapshot. Once the journal grows past a threshold the next save writes a
+    fresh snapshot (temp file + os.replace) and starts a new journal.
+
+    Every snapshot gets a new generation id, and journal records carry the id
+    of the snapshot they apply to. A crash between writing a snapshot and
+    truncating the old journal therefore can't replay stale records.
+
+    Snapshots of an older save format version are upgraded on load (see
+    app/utils/migrations.py); the first snapshot written afterwards keeps the
+    old file as save.v<old version>.json. VN bodies of a sectioned snapshot are
+    upgraded one at a time, as they are loaded or rewritten.
+
+    Snapshots are written as compact JSON, optionally compressed (see configure);
+    load detects the format on its own. VN bodies sit on their own lines after
+    a header and are only decoded on first use; a snapshot in the older
+    single-document layout is rewritten in this one on the next save.
+    """
+
+    name = "json"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.journal_path = f"{os.path.splitext(path)[0]}.journal"
+        self._generation = None
+        self._journal_records = 0
+        self._journal_bytes = 0
+        self._torn_tail = False
+        self.upgraded = False
+        # Format version of the snapshot on disk and of the raw VN lines read from it
+        self._loaded_version = migrations.SAVE_FORMAT_VERSION
+        self.compression = "none"
+        self._snapshot_due = False
+
+    def configure(self, compression: str) -> None:
+        """
+        Sets the snapshot compression. The next save writes a fresh snapshot with it.
+        """
+        compression = _resolve_compression(compression)
+        if compression != self.compression:
+            self.compression = compression
+            self._snapshot_due = True
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> dict:
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        # Remember the format on disk so configure() knows whether a rewrite is needed
+        self.compression = _detect_compression(raw)
+        raw = _decompress(raw)
+        head_end = raw.find(b"\n")
+        try:
+            data = _loads(raw[:head_end] if head_end >= 0 else raw)
+        except ValueError:
+            # Multi-line document (old indented save)
+            data = None
+        if isinstance(data, dict) and _VN_IDS_KEY in data:
+            version = migrations.save_version(data)
+            lines = dict(zip(data.pop(_VN_IDS_KEY), _split_lines(raw, head_end + 1)))
+            data["vns"] = library_data.LazyVns(lines, _body_decoder(version))
+        else:
+            if data is None:
+                data = _loads(raw)
+            if not isinstance(data, dict):
+                raise ValueError("save file does not hold a JSON object")
+            # Older single-document snapshot; the next save rewrites it in sections
+            self._snapshot_due = True
+        self._generation = data.pop(_GENERATION_KEY, None)
+        version = migrations.save_version(data)
+        self._loaded_version = version
+        self.upgraded = migrations.migrate(data, version)
+        self._journal_records = 0
+        self._journal_bytes = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    self._journal_bytes += len(line)
+                    self._torn_tail = not line.endswith(b"\n")
+                    try:
+                        record = decode_json(line)
+                    except ValueError:
+                        # Torn last line from a crash mid-append
+                        continue
+                    if self._generation is None or record.get("gen") != self._generation:
+                        continue
+                    if self.upgraded and "vn" in record:
+                        record["vn"] = migrations.migrate_vn(record["vn"], version)
+                    _apply_record(data, record)
+                    self._journal_records += 1
+        except FileNotFoundError:
+            pass
+        if self.upgraded:
+            # The snapshot on disk has the old format; don't journal on top of it
+            self._generation = None
+        return data
+
+    def save(self, data: dict, changes: list[tuple] | None = None) -> None:
+        if (
+            changes is not None
+            and self._generation is not None
+            and not self._snapshot_due
+            and not self._journal_full()
+        ):
+            records = [_change_record(data, change) for change in changes]
+            if all(record is not None for record in records):
+                self._append(records)
+                return
+        self._write_snapshot(data)
+
+    def _journal_full(self) -> bool:
+        return (
+            self._journal_records >= JOURNAL_COMPACT_RECORDS
+            or self._journal_bytes >= JOURNAL_COMPACT_BYTES
+        )
+
+    def _append(self, records: list[dict]) -> None:
+        lines = b"".join(encode_json({"gen": self._generation, **record}) + b"\n" for record in records)
+        if self._torn_tail:
+            # Terminate a half-written line so it doesn't swallow the next record
+            lines = b"\n" + lines
+        with open(self.journal_path, "ab") as f:
+            f.write(lines)
+        self._torn_tail = False
+        self._journal_records += len(records)
+        self._journal_bytes += len(lines)
+
+    def _write_snapshot(self, data: dict) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self.upgraded and os.path.exists(self.path):
+            shutil.copy2(self.path, f"{os.path.splitext(self.path)[0]}.v{self._loaded_version}.json")
+            self.upgraded = False
+        generation = os.urandom(8).hex()
+        tmp_path = f"{self.path}.tmp"
+        lines = self._snapshot_lines(data, generation)
+        with open(tmp_path, "wb") as f:
+            write_lines(f, lines, self.compression)
+        os.replace(tmp_path, self.path)
+        self._generation = generation
+        self._snapshot_due = False
+        # Records of the old generation are ignored from here on, so losing this
+        # truncation to a crash is harmless.
+        with open(self.journal_path, "wb"):
+            pass
+        self._journal_records = 0
+        self._journal_bytes = 0
+        self._torn_tail = False
+
+    def _snapshot_lines(self, data: dict, generation: str | None) -> list:
+        vns = data.get("vns", {})
+        # Bodies that were never loaded are written back as the raw lines they were read as
+        items = vns.stored_items() if isinstance(vns, library_data.LazyVns) else list(vns.items())
+        header = {key: value for key, value in data.items() if key != "vns"}
+        header[_GENERATION_KEY] = generation
+        upgrade = migrations.has_vn_steps(self._loaded_version)
+        lines = []
+        for _, body in items:
+            if not isinstance(body, dict) and upgrade:
+                # Raw line of an older format: upgrade it on its own, never the whole library at once
+                body = migrations.migrate_vn(_loads(body), self._loaded_version)
+            lines.append(encode_json(body) if isinstance(body, dict) else body)
+        return _section_lines(header, [vn_id for vn_id, _ in items], lines)
+
+    def export_snapshot(self) -> list:
+        """
+        Returns the stored save (snapshot plus journal) as the lines of one
+        snapshot in the current format, for write_lines(); used for backups.
+        Never-loaded bodies are copied as raw lines, so this doesn't decode
+        the library.
+        """
+        return self._snapshot_lines(self.load(), None)
+
+    def files(self) -> list[str]:
+        return [self.path, self.journal_path]
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteStorage:
+    """
+    Stores save data in SQLite with one row per category, VN, category
+    membership and setting, so a save only touches the rows named by its change
+    tuples. A VN's VNDB fields are kept as a JSON body so new fields need no
+    schema change; added_at and notes live on the membership row.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._closed = False
+        # Table layout and save format upgrades happen in place (_connect, load)
+        self.upgraded = False
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        if self._closed:
+            # A LazyVns of this storage outliving it must not recreate an empty database
+            raise sqlite3.ProgrammingError(f"{self.path} storage is closed")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        with conn:
+            old_rows = []
+            if version == 1:
+                # v1 stored a full VN copy per category row
+                old_rows = conn.execute("SELECT category, body, notes FROM vns ORDER BY category, position").fetchall()
+                conn.execute("DROP TABLE vns")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS categories ("
+                " name TEXT PRIMARY KEY,"
+                " position INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS vns (vn_id TEXT PRIMARY KEY, body TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memberships ("
+                " category TEXT NOT NULL,"
+                " vn_id TEXT NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " added_at REAL,"
+                " notes TEXT,"
+                " PRIMARY KEY (category, vn_id))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            # Top-level keys other than categories/vns/lists/settings
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            if old_rows:
+                old = {}
+                for category, body, notes in old_rows:
+                    vn = json.loads(body)
+                    if notes is not None:
+                        vn["notes"] = notes
+                    old.setdefault(category, []).append(vn)
+                migrated = {"vns": old}
+                library_data.normalize(migrated)
+                self._insert_library(conn, migrated)
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn = conn
+        return conn
+
+    def load(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            data = {
+                "categories": [name for (name,) in conn.execute("SELECT name FROM categories ORDER BY position")],
+                "vns": library_data.LazyVns(
+                    {vn_id: None for (vn_id,) in conn.execute("SELECT vn_id FROM vns")}, self._fetch_bodies
+                ),
+                "lists": {},
+                "settings": {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")},
+            }
+            for category, vn_id, added_at, notes in conn.execute(
+                "SELECT category, vn_id, added_at, notes FROM memberships ORDER BY category, position"
+            ):
+                entry = {"id": vn_id}
+                if added_at is not None:
+                    entry["added_at"] = added_at
+                if notes:
+                    entry["notes"] = notes
+                data["lists"].setdefault(category, []).append(entry)
+            for key, value in conn.execute("SELECT key, value FROM meta"):
+                data[key] = json.loads(value)
+            version = migrations.save_version(data)
+            if version < migrations.SAVE_FORMAT_VERSION:
+                # Upgrade in place, in one transaction, so the database is never half migrated
+                with conn:
+                    if migrations.has_vn_steps(version):
+                        self._migrate_bodies(conn, version)
+                    migrations.migrate(data, version)
+                    self._replace_all(conn, data)
+            else:
+                migrations.migrate(data, version)
+            return data
+
+    def _migrate_bodies(self, conn: sqlite3.Connection, version: int) -> None:
+        # Batch by batch in id order, so only _FETCH_BATCH bodies are decoded at a time
+        last = ""
+        while True:
+            rows = conn.execute(
+                "SELECT vn_id, body FROM vns WHERE vn_id > ? ORDER BY vn_id LIMIT ?", (last, _FETCH_BATCH)
+            ).fetchall()
+            if not rows:
+                return
+            conn.executemany(
+                "UPDATE vns SET body = ? WHERE vn_id = ?",
+                [
+                    (json.dumps(migrations.migrate_vn(json.loads(body), version), ensure_ascii=False), vn_id)
+                    for vn_id, body in rows
+                ],
+            )
+            last = rows[-1][0]
+
+    def _fetch_bodies(self, pending: dict) -> dict:
+        vn_ids = list(pending)
+        bodies = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(vn_ids), _FETCH_BATCH):
+                batch = vn_ids[start:start + _FETCH_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                for vn_id, body in conn.execute(f"SELECT vn_id, body FROM vns WHERE vn_id IN ({placeholders})", batch):
+                    bodies[vn_id] = json.loads(body)
+        return bodies
+
+    def save(self, data: dict, changes: list[tuple] | None = None) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if changes is None or not all(self._apply(conn, data, change) for change in changes):
+                    self._replace_all(conn, data)
+
+    def _append_member(self, conn: sqlite3.Connection, category: str, entry: dict) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO memberships VALUES (?, ?,"
+            " (SELECT COALESCE(MAX(position), -1) + 1 FROM memberships WHERE category = ?), ?, ?)",
+            (category, entry["id"], category, entry.get("added_at"), entry.get("notes")),
+        )
+
+    def _drop_orphans(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM vns WHERE vn_id NOT IN (SELECT vn_id FROM memberships)")
+
+    def _apply(self, conn: sqlite3.Connection, data: dict, change: tuple) -> bool:
+        """
+        Applies one change tuple. Returns False when the change can't be applied
+        row by row, in which case the caller rewrites everything.
+        """
+        op, *args = change
+        if op == "setting":
+            key = args[0]
+            if key not in data.get("settings", {}):
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                (key, json.dumps(data["settings"][key], ensure_ascii=False)),
+            )
+        elif op == "add_category":
+            conn.execute(
+                "INSERT OR REPLACE INTO categories VALUES (?,"
+                " (SELECT COALESCE(MAX(position), -1) + 1 FROM categories))",
+                (args[0],),
+            )
+        elif op == "rename_category":
+            old, new = args
+            conn.execute("UPDATE categories SET name = ? WHERE name = ?", (new, old))
+            conn.execute("DELETE FROM memberships WHERE category = ?", (new,))
+            conn.execute("UPDATE memberships SET category = ? WHERE category = ?", (new, old))
+            self._drop_orphans(conn)
+        elif op == "delete_category":
+            conn.execute("DELETE FROM categories WHERE name = ?", (args[0],))
+            conn.execute("DELETE FROM memberships WHERE category = ?", (args[0],))
+            self._drop_orphans(conn)
+        elif op == "add_vn":
+            category, vn_id = args
+            entry = library_data.find_entry(data, category, vn_id)
+            vns = data.get("vns", {})
+            if entry is None or vn_id not in vns:
+                return False
+            # Reading an unloaded body would fetch it under self._lock, which save() holds
+            vn = vns.stored(vn_id) if isinstance(vns, library_data.LazyVns) else vns[vn_id]
+            if isinstance(vn, dict):
+                conn.execute(
+                    "INSERT OR REPLACE INTO vns VALUES (?, ?)",
+                    (vn_id, json.dumps(vn, ensure_ascii=False)),
+                )
+            # Otherwise the body was never loaded from its row, which is still there
+            self._append_member(conn, category, entry)
+        elif op == "remove_vn":
+            conn.execute("DELETE FROM memberships WHERE category = ? AND vn_id = ?", tuple(args))
+            conn.execute(
+                "DELETE FROM vns WHERE vn_id = ? AND vn_id NOT IN (SELECT vn_id FROM memberships)",
+                (args[1],),
+            )
+        elif op == "move_vn":
+            src, dest, vn_id = args
+            entry = library_data.find_entry(data, dest, vn_id)
+            if entry is None:
+                return False
+            conn.execute("DELETE FROM memberships WHERE category = ? AND vn_id = ?", (src, vn_id))
+            if conn.execute(
+                "SELECT 1 FROM memberships WHERE category = ? AND vn_id = ?", (dest, vn_id)
+            ).fetchone() is None:
+                self._append_member(conn, dest, entry)
+        elif op == "note":
+            category, vn_id = args
+            entry = library_data.find_entry(data, category, vn_id)
+            if entry is None:
+                return False
+            conn.execute(
+                "UPDATE memberships SET notes = ? WHERE category = ? AND vn_id = ?",
+                (entry.get("notes"), category, vn_id),
+            )
+        else:
+            return False
+        return True
+
+    def _insert_library(self, conn: sqlite3.Connection, data: dict) -> None:
+        vns = data.get("vns", {})
+        # Unloaded bodies of a LazyVns read from this database are already in their rows
+        items = vns.stored_items() if isinstance(vns, library_data.LazyVns) else vns.items()
+        conn.executemany(
+            "INSERT OR REPLACE INTO vns VALUES (?, ?)",
+            [(vn_id, json.dumps(vn, ensure_ascii=False)) for vn_id, vn in items if isinstance(vn, dict)],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO memberships VALUES (?, ?, ?, ?, ?)",
+            [
+                (category, entry["id"], i, entry.get("added_at"), entry.get("notes"))
+                for category, entries in data.get("lists", {}).items()
+                for i, entry in enumerate(entries)
+            ],
+        )
+
+    def _replace_all(self, conn: sqlite3.Connection, data: dict) -> None:
+        lazy = isinstance(data.get("vns"), library_data.LazyVns)
+        tables = ["categories", "memberships", "settings", "meta"]
+        if not lazy:
+            tables.append("vns")
+        for table in tables:
+            conn.execute(f"DELETE FROM {table}")
+        conn.executemany(
+            "INSERT OR REPLACE INTO categories VALUES (?, ?)",
+            [(name, i) for i, name in enumerate(data.get("categories", []))],
+        )
+        self._insert_library(conn, data)
+        if lazy:
+            self._drop_orphans(conn)
+        conn.executemany(
+            "INSERT INTO settings VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in data.get("settings", {}).items()],
+        )
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                (k, json.dumps(v, ensure_ascii=False))
+                for k, v in data.items()
+                if k not in ("categories", "vns", "lists", "settings")
+            ],
+        )
+
+    def export_snapshot(self) -> list:
+        """
+        Returns the database contents as the lines of a JSON snapshot (the
+        layout JsonStorage writes), for write_lines(); used for backups. VN
+        bodies are copied as the JSON text they are stored as, without
+        decoding them.
+        """
+        data = self.load()
+        del data["vns"]
+        vn_ids = []
+        lines = []
+        with self._lock:
+            cursor = self._connect().execute("SELECT vn_id, body FROM vns")
+            # fetchmany: building every row in one call would hold the GIL throughout
+            while rows := cursor.fetchmany(_FETCH_BATCH):
+                for vn_id, body in rows:
+                    vn_ids.append(vn_id)
+                    lines.append(body.encode("utf-8"))
+        return _section_lines(data, vn_ids, lines)
+
+    def files(self) -> list[str]:
+        return [self.path, f"{self.path}-wal"]
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,3 +1,5 @@
+import multiprocessing
+from app.utils import startup_timing
 from app.utils.save import load_data
 from app.ui.shared.theme import (
     set_active_theme,
@@ -8,7 +10,11 @@ from app.ui.shared.theme import (
 )
 
 if __name__ == "__main__":
+    # Needed for the image process pool in frozen (.exe) builds
+    multiprocessing.freeze_support()
+    startup_timing.mark("imports")
     data = load_data()
+    startup_timing.mark("load save data")
     settings = data.get("settings", {})
     theme_name = settings.get("theme_name", DEFAULT_THEME_NAME)
     font_scale = settings.get("font_scale", DEFAULT_FONT_SCALE)
@@ -19,6 +25,9 @@ if __name__ == "__main__":
         set_active_theme(DEFAULT_THEME_NAME)
     set_font_scale(font_scale)
     set_high_contrast_mode(high_contrast_mode)
+    startup_timing.mark("apply theme")
     from app.ui.main.main_window import run
-    run()
-#do not touch unless data changes are made to the save file structure, in which case this should be updated to migrate old save data to the new format
+    startup_timing.mark("import main window")
+    # Hand the already loaded data over so the save file is only parsed once
+    run(data)
+#do not touch unless data changes are made to the save file structure, in which case add a migration for old save data in app/utils/migrations.py
@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from app.utils import library_data, migrations
+from app.utils.storage import JsonStorage, SqliteStorage
+
+
+def _v1_save() -> dict:
+    # Layout before save_version: each category held full VN dicts
+    return {
+        "categories": ["Planned", "Finished"],
+        "vns": {
+            "Planned": [
+                {"id": "v1", "title": "One", "added_at": 10.0, "notes": "later"},
+                {"id": "v2", "title": "Two"},
+            ],
+            "Finished": [{"id": "v1", "title": "One", "notes": "done"}],
+        },
+        "settings": {"low_perf_mode": True},
+    }
+
+
+def _v2_save() -> dict:
+    data = {"categories": ["Planned"], "vns": {}, "lists": {}, "settings": {}, migrations.VERSION_KEY: 2}
+    for i in range(5):
+        library_data.add_vn(data, "Planned", {"id": f"v{i}", "title": f"T{i}"})
+    return data
+
+
+def _check_upgraded(data: dict) -> None:
+    assert data[migrations.VERSION_KEY] == migrations.SAVE_FORMAT_VERSION
+    assert set(data["vns"]) == {"v1", "v2"}
+    assert data["vns"]["v1"]["title"] == "One"
+    assert [entry["id"] for entry in data["lists"]["Planned"]] == ["v1", "v2"]
+    assert library_data.find_entry(data, "Planned", "v1")["notes"] == "later"
+    assert library_data.find_entry(data, "Finished", "v1")["notes"] == "done"
+    assert data["settings"] == {"low_perf_mode": True}
+
+
+@pytest.fixture
+def add_vn_step(monkeypatch):
+    # Registers a v3 that adds a field to every VN body, and records the ids it ran on
+    seen = []
+
+    def step(vn: dict) -> dict:
+        seen.append(vn["id"])
+        return {**vn, "upgraded": True}
+
+    monkeypatch.setattr(migrations, "SAVE_FORMAT_VERSION", 3)
+    monkeypatch.setitem(migrations.MIGRATIONS, 3, {"data": None, "vn": step})
+    return seen
+
+
+def test_json_storage_upgrades_v1_save(tmp_path):
+    path = tmp_path / "save.json"
+    path.write_text(json.dumps(_v1_save(), indent=4))
+    storage = JsonStorage(str(path))
+    data = storage.load()
+    assert storage.upgraded
+    _check_upgraded(data)
+
+    storage.save(data)
+    assert (tmp_path / "save.v1.json").exists()
+    reloaded = JsonStorage(str(path))
+    _check_upgraded(reloaded.load())
+    assert not reloaded.upgraded
+
+
+def test_sqlite_storage_upgrades_v1_schema(tmp_path):
+    path = tmp_path / "library.sqlite3"
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE categories (name TEXT PRIMARY KEY, position INTEGER NOT NULL)")
+        conn.execute(
+            "CREATE TABLE vns (category TEXT NOT NULL, vn_id TEXT NOT NULL, position INTEGER NOT NULL,"
+            " body TEXT NOT NULL, notes TEXT, PRIMARY KEY (category, vn_id))"
+        )
+        conn.execute("CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.executemany("INSERT INTO categories VALUES (?, ?)", [("Planned", 0), ("Finished", 1)])
+        for category, vns in _v1_save()["vns"].items():
+            for position, vn in enumerate(vns):
+                notes = vn.pop("notes", None)
+                conn.execute(
+                    "INSERT INTO vns VALUES (?, ?, ?, ?, ?)",
+                    (category, vn["id"], position, json.dumps(vn), notes),
+                )
+        conn.execute("INSERT INTO settings VALUES ('low_perf_mode', 'true')")
+        conn.execute("PRAGMA user_version = 1")
+    conn.close()
+
+    storage = SqliteStorage(str(path))
+    try:
+        data = storage.load()
+        _check_upgraded(data)
+    finally:
+        storage.close()
+    storage = SqliteStorage(str(path))
+    try:
+        _check_upgraded(storage.load())
+    finally:
+        storage.close()
+
+
+@pytest.mark.parametrize("storage_class, name", [(JsonStorage, "save.json"), (SqliteStorage, "library.sqlite3")])
+def test_newer_save_version_is_rejected(tmp_path, storage_class, name):
+    storage = storage_class(str(tmp_path / name))
+    try:
+        data = _v2_save()
+        data[migrations.VERSION_KEY] = migrations.SAVE_FORMAT_VERSION + 1
+        storage.save(data)
+    finally:
+        storage.close()
+    storage = storage_class(str(tmp_path / name))
+    try:
+        with pytest.raises(migrations.SaveVersionError):
+            storage.load()
+    finally:
+        storage.close()
+
+
+def test_save_version_rejects_newer_version():
+    with pytest.raises(migrations.SaveVersionError):
+        migrations.save_version({migrations.VERSION_KEY: migrations.SAVE_FORMAT_VERSION + 1, "lists": {}})
+
+
+def test_json_storage_migrates_vn_bodies_as_they_stream(tmp_path, add_vn_step):
+    path = str(tmp_path / "save.json")
+    JsonStorage(path).save(_v2_save())
+
+    storage = JsonStorage(path)
+    data = storage.load()
+    assert data[migrations.VERSION_KEY] == 3
+    assert add_vn_step == []
+    assert data["vns"]["v2"]["upgraded"]
+    assert add_vn_step == ["v2"]
+
+    # The rewrite upgrades the bodies that were never loaded one line at a time
+    storage.save(data)
+    assert sorted(add_vn_step) == [f"v{i}" for i in range(5)]
+    assert os.path.exists(tmp_path / "save.v2.json")
+    reloaded = JsonStorage(path).load()
+    assert all(reloaded["vns"][f"v{i}"]["upgraded"] for i in range(5))
+    assert len(add_vn_step) == 5
+
+
+def test_sqlite_storage_migrates_vn_bodies_in_place(tmp_path, add_vn_step):
+    path = str(tmp_path / "library.sqlite3")
+    storage = SqliteStorage(path)
+    try:
+        storage.save(_v2_save())
+    finally:
+        storage.close()
+
+    storage = SqliteStorage(path)
+    try:
+        data = storage.load()
+        assert data[migrations.VERSION_KEY] == 3
+        assert sorted(add_vn_step) == [f"v{i}" for i in range(5)]
+        assert all(data["vns"][f"v{i}"]["upgraded"] for i in range(5))
+    finally:
+        storage.close()
+    storage = SqliteStorage(path)
+    try:
+        storage.load()
+    finally:
+        storage.close()
+    assert len(add_vn_step) == 5
@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from app.utils import library_data
+from app.utils.storage import SqliteStorage
+
+
+def _saved_library(path: str) -> None:
+    data = {"categories": ["A", "B"], "vns": {}, "lists": {}, "settings": {}}
+    for i in range(3):
+        library_data.add_vn(data, "A", {"id": f"v{i}", "title": f"T{i}"})
+    storage = SqliteStorage(path)
+    try:
+        storage.save(data)
+    finally:
+        storage.close()
+
+
+def test_sqlite_add_vn_with_unloaded_body(tmp_path):
+    path = str(tmp_path / "library.sqlite3")
+    _saved_library(path)
+    storage = SqliteStorage(path)
+    try:
+        data = storage.load()
+        # The VN is already in the library, so its body is still an unloaded placeholder
+        data["lists"]["B"] = [{"id": "v1"}]
+        saver = threading.Thread(target=storage.save, args=(data, [("add_vn", "B", "v1")]), daemon=True)
+        saver.start()
+        saver.join(5)
+        assert not saver.is_alive()
+        assert data["vns"].loaded_count() == 0
+    finally:
+        storage.close()
+
+    storage = SqliteStorage(path)
+    try:
+        data = storage.load()
+        assert [entry["id"] for entry in data["lists"]["B"]] == ["v1"]
+        assert data["vns"]["v1"]["title"] == "T1"
+    finally:
+        storage.close()
+
+
+def test_sqlite_closed_storage_does_not_reconnect(tmp_path):
+    path = str(tmp_path / "library.sqlite3")
+    _saved_library(path)
+    storage = SqliteStorage(path)
+    data = storage.load()
+    storage.close()
+    for name in storage.files() + [f"{path}-shm"]:
+        if os.path.exists(name):
+            os.remove(name)
+
+    with pytest.raises(sqlite3.Error):
+        data["vns"]["v0"]
+    assert not os.path.exists(path)